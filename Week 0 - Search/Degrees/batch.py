@@ -0,0 +1,165 @@
+"""
+Answers many Degrees queries at once.
+
+Reads one tab-separated source/target pair per line, given as person ids
+or names, from a file or stdin, and writes one JSON line per pair to stdout
+in input order. Queries are spread over a process pool; every worker
+memory-maps the same snapshot, so the graph is shared read-only between
+them instead of being loaded once per process.
+
+The snapshot is kept in the data directory unless --snapshot names
+another place for it, and a snapshot that cannot be written stops the
+run before any worker starts.
+
+Usage: python batch.py directory [pairs] [--workers N] [--snapshot PATH]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import degrees
+
+# Pairs handed to a worker at a time
+CHUNK_SIZE = 64
+
+# Chunks in flight per worker, which bounds memory on large inputs
+CHUNKS_PER_WORKER = 4
+
+# A misspelled name is only replaced by its closest match if the match
+# is at least this similar and beats every other candidate by SUBSTITUTE_MARGIN
+SUBSTITUTE_SIMILARITY = 0.7
+SUBSTITUTE_MARGIN = 0.1
+
+# Candidates listed for a person who cannot be resolved
+CANDIDATES = 5
+
+
+def init_worker(directory, landmarks=None, snapshot=None):
+    """
+    Loads the graph in a worker process from the shared snapshot, kept at
+    path `snapshot` if given, and the landmark tables at path `landmarks`
+    if given.
+    """
+    degrees.load_data(directory, compact=True, path=snapshot)
+    if landmarks is not None:
+        degrees.load_landmarks(landmarks)
+
+
+def init_parent(directory, landmarks=None, snapshot=None):
+    """
+    Loads the graph in the parent process as init_worker does, building
+    the snapshot for the workers, and exits if it could not be written,
+    since each worker would then parse its own private copy of the data.
+    """
+    init_worker(directory, landmarks, snapshot)
+    if not degrees.snapshot_ready:
+        sys.exit("Could not write the snapshot; use --snapshot to keep it elsewhere.")
+
+
+def resolve(person):
+    """
+    Returns (person_id, details) for an id or name, without prompting.
+
+    details holds the id and name of the person matched, and for a
+    misspelled name that was replaced by its closest match, the original
+    as "resolved_from". Only a clear closest match is used. If the name
+    matches no one or more than one person, person_id is None and
+    details lists the candidates instead.
+    """
+    if person in degrees.people:
+        return person, describe(person)
+    person_ids = sorted(degrees.names.get(person.lower(), set()))
+    if len(person_ids) == 1:
+        return person_ids[0], describe(person_ids[0])
+
+    if len(person_ids) == 0:
+        ranked = degrees.get_name_index().ranked(person, 2)
+        if ranked:
+            score, name = ranked[0]
+            matches = degrees.names[name]
+            if (score >= SUBSTITUTE_SIMILARITY and len(matches) == 1
+                    and (len(ranked) == 1
+                         or score - ranked[1][0] >= SUBSTITUTE_MARGIN)):
+                person_id = next(iter(matches))
+                details = describe(person_id)
+                details["resolved_from"] = person
+                return person_id, details
+        person_ids = degrees.candidates_for_name(person, CANDIDATES)
+
+    return None, {
+        "query": person,
+        "candidates": [describe(person_id) for person_id in person_ids[:CANDIDATES]]
+    }
+
+
+def describe(person_id):
+    """
+    Returns the JSON-ready id, name and birth year of a person.
+    """
+    person = degrees.people[person_id]
+    return {"id": person_id, "name": person["name"], "birth": person["birth"]}
+
+
+def answer(pair):
+    """
+    Returns the JSON-ready result of one source/target query.
+    """
+    (source_id, source), (target_id, target) = map(resolve, pair)
+    result = {"source": source, "target": target}
+    if source_id is None or target_id is None:
+        result["error"] = "Person not found."
+        return result
+
+    path = degrees.shortest_path(source_id, target_id, mode="bidirectional")
+    result["degrees"] = None if path is None else len(path)
+    result["path"] = path
+    return result
+
+
+def read_pairs(lines):
+    """
+    Yields (source, target) pairs from tab-separated lines.
+    """
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        fields = line.split("\t")
+        if len(fields) != 2:
+            sys.exit(f"Expected two tab-separated people: {line!r}")
+        yield fields[0].strip(), fields[1].strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer Degrees queries in bulk.")
+    parser.add_argument("directory")
+    parser.add_argument("pairs", nargs="?", help="file of pairs, stdin if omitted")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--snapshot", help="where to keep the snapshot of the graph")
+    args = parser.parse_args()
+
+    # build the snapshot once up front so every worker just maps it
+    init_parent(args.directory, snapshot=args.snapshot)
+
+    lines = open(args.pairs, encoding="utf-8") if args.pairs else sys.stdin
+    pairs = read_pairs(lines)
+    block_size = CHUNK_SIZE * CHUNKS_PER_WORKER * args.workers
+    with lines, ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=init_worker,
+        initargs=(args.directory, None, args.snapshot)
+    ) as pool:
+
+        # answer a block at a time; map keeps each block in input order
+        while block := list(itertools.islice(pairs, block_size)):
+            for result in pool.map(answer, block, chunksize=CHUNK_SIZE):
+                print(json.dumps(result))
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
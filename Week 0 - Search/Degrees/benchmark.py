@@ -0,0 +1,257 @@
+"""
+Benchmarks Degrees loading and search on synthetic datasets.
+
+Generates people, movies and stars CSV files of a chosen size, with cast
+sizes and careers following power laws as in real film data, then times
+load_data, per-query shortest_path latency and search statistics for
+each search mode, and reports the results as JSON. Each run of the
+dictionary or compact representation happens in a fresh process, so
+its peak memory is reported on its own. The compact graph is run both
+parsed from the CSV files and loaded from a snapshot of them.
+
+Usage: python benchmark.py [--people N] [--movies N] [--queries N] ...
+"""
+
+import argparse
+import csv
+import importlib
+import itertools
+import multiprocessing
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import degrees
+from util import SOURCES, percentiles
+
+try:
+    import resource
+except ImportError:
+    # only Unix has it, so peak resident memory is not reported elsewhere
+    resource = None
+
+# Exponent of the power laws for cast sizes and careers
+POWER_LAW_EXPONENT = 2.1
+
+# Largest cast generated for a single movie
+MAX_CAST = 200
+
+
+def power_law(rng, exponent, limit):
+    """
+    Returns an integer in [1, limit] drawn from a discrete power law.
+    """
+    return min(limit, int((1 - rng.random()) ** (-1 / (exponent - 1))))
+
+
+def generate(directory, people_count, movie_count, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv to `directory`.
+
+    Each movie's cast size follows a power law, and cast members are
+    drawn in proportion to a power-law popularity weight per person,
+    so a few people appear in many movies and most in only a few.
+    Every person also gets at least one role, as a newcomer.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(people_count):
+            writer.writerow([person, f"Person {person}", rng.randint(1900, 2010)])
+
+    with open(os.path.join(directory, "movies.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(movie_count):
+            writer.writerow([movie, f"Movie {movie}", rng.randint(1920, 2023)])
+
+    popularity = list(itertools.accumulate(
+        power_law(rng, POWER_LAW_EXPONENT, people_count)
+        for _ in range(people_count)
+    ))
+    with open(os.path.join(directory, "stars.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(movie_count):
+            cast_size = power_law(rng, POWER_LAW_EXPONENT, MAX_CAST)
+            cast = set(rng.choices(range(people_count),
+                                   cum_weights=popularity, k=cast_size))
+            cast.update(range(movie * people_count // movie_count,
+                              (movie + 1) * people_count // movie_count))
+            for person in cast:
+                writer.writerow([person, movie])
+
+
+def fresh_degrees():
+    """
+    Returns the degrees module with none of the data of earlier runs.
+    """
+    return importlib.reload(degrees)
+
+
+def bench_load(directory, compact, snapshot=False):
+    """
+    Times load_data, then loads the data again with tracemalloc on to
+    measure the Python memory it allocates, since tracing slows loading.
+    """
+    # import what the compact graph needs first, so as not to time it
+    if compact:
+        importlib.import_module("snapshot")
+
+    module = fresh_degrees()
+    start = time.perf_counter()
+    module.load_data(directory, compact=compact, snapshot=snapshot)
+    seconds = time.perf_counter() - start
+
+    module = fresh_degrees()
+    tracemalloc.start()
+    module.load_data(directory, compact=compact, snapshot=snapshot)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return module, {"seconds": seconds, "peak_bytes": peak}
+
+
+def write_snapshot(directory):
+    """
+    Writes the snapshot of the compact graph of `directory`.
+    """
+    fresh_degrees().load_data(directory, compact=True)
+
+
+def bench_queries(module, pairs, mode):
+    """
+    Runs every pair through shortest_path, collecting the latency and
+    SearchStats of each query.
+    """
+    collected = []
+    module.add_profile_hook(collected.append)
+    try:
+        for source, target in pairs:
+            module.shortest_path(source, target, mode=mode)
+    finally:
+        module.remove_profile_hook(collected.append)
+
+    return {
+        "queries": len(pairs),
+        "connected": sum(stats.length is not None for stats in collected),
+        "latency_seconds": percentiles([stats.total_seconds for stats in collected]),
+        "neighbor_seconds": percentiles([stats.neighbor_seconds for stats in collected]),
+        "expanded": percentiles([stats.expanded for stats in collected]),
+        "generated": percentiles([stats.generated for stats in collected]),
+        "duplicates": percentiles([stats.duplicates for stats in collected]),
+        "peak_frontier": percentiles([stats.peak_frontier for stats in collected])
+    }
+
+
+def bench_run(directory, compact, snapshot, args):
+    """
+    Loads the data, from its snapshot if `snapshot` is set, and
+    benchmarks every mode, returning the results of the run. Meant to
+    be called in a fresh process of its own.
+    """
+    module, load = bench_load(directory, compact, snapshot)
+    rng = random.Random(args.seed)
+    people = list(module.people)
+    sources = rng.sample(people, min(args.sources, len(people)))
+    pairs = [(rng.choice(sources), rng.choice(people))
+             for _ in range(args.queries)]
+
+    run = {"compact": compact, "snapshot": snapshot, "people": len(module.people),
+           "movies": len(module.movies), "load": load, "modes": {}}
+    for mode in args.modes.split(","):
+        if mode == "astar":
+            start = time.perf_counter()
+            module.build_landmarks()
+            run["landmark_seconds"] = time.perf_counter() - start
+        run["modes"][mode] = bench_queries(module, pairs, mode)
+
+    # peak resident memory of this run's process, which ru_maxrss gives
+    # in kilobytes except on macOS
+    run["max_rss_bytes"] = None
+    if resource is not None:
+        scale = 1 if sys.platform == "darwin" else 1024
+        run["max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Degrees search.")
+    parser.add_argument("--people", type=int, default=10000)
+    parser.add_argument("--movies", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--sources", type=int, default=5,
+                        help="distinct sources the queries start from")
+    parser.add_argument("--modes", default="bfs,bidirectional,tree,astar")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compact", action="store_true",
+                        help="also benchmark the compact graph")
+    parser.add_argument("--directory",
+                        help="existing dataset to use instead of generating one")
+    parser.add_argument("--output", help="file for the JSON results, stdout if omitted")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.directory
+        generate_seconds = None
+        if directory is None:
+            directory = scratch
+            start = time.perf_counter()
+            generate(directory, args.people, args.movies, args.seed)
+            generate_seconds = time.perf_counter() - start
+
+        # a fresh spawned process per run keeps their peak memory apart
+        runs = []
+        context = multiprocessing.get_context("spawn")
+
+        def in_process(function, *arguments):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                return pool.submit(function, *arguments).result()
+
+        runs.append(in_process(bench_run, directory, False, False, args))
+        if args.compact:
+            runs.append(in_process(bench_run, directory, True, False, args))
+
+            # never write a snapshot into a dataset that is not ours,
+            # so snapshot a copy of it instead
+            snapshot_directory = directory
+            if args.directory is not None:
+                snapshot_directory = os.path.join(scratch, "copy")
+                os.makedirs(snapshot_directory)
+                for name in SOURCES:
+                    shutil.copy2(os.path.join(directory, name), snapshot_directory)
+            in_process(write_snapshot, snapshot_directory)
+            runs.append(in_process(bench_run, snapshot_directory, True, True, args))
+
+        results = {
+            "python": sys.version.split()[0],
+            "dataset": {
+                "directory": args.directory,
+                "people": runs[0]["people"],
+                "movies": runs[0]["movies"],
+                "seed": args.seed,
+                "queries": args.queries,
+                "sources": args.sources,
+                "generate_seconds": generate_seconds
+            },
+            "runs": runs
+        }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,765 @@
+"""
+Compact, integer-indexed form of the Degrees dataset.
+
+People and movies are numbered densely from 0 and the star relation is
+kept as two CSR (compressed sparse row) adjacency structures, one from
+people to movies and one from movies to stars, so that searches run
+over flat integer arrays instead of dictionaries of sets.
+"""
+
+import csv
+import time
+from collections.abc import Mapping
+
+import numpy as np
+
+from util import UnionFind
+
+# Stars added by CompactGraph.extend that are kept outside the CSR
+# arrays before they are merged in
+MERGE_LIMIT = 10000
+
+
+class StringTable():
+    """
+    Immutable list of strings kept as one UTF-8 buffer plus offsets.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(string) for string in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+
+    def extend(self, strings):
+        """Returns a new StringTable with `strings` appended."""
+        added = StringTable.from_strings(strings)
+        return StringTable(
+            np.concatenate([self.data, added.data]),
+            np.concatenate([self.offsets, self.offsets[-1] + added.offsets[1:]])
+        )
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.data[start:end].tobytes().decode("utf-8")
+
+
+class SortedIndex():
+    """
+    Finds rows of a StringTable by binary search over a permutation
+    that orders the table's strings (lowercased if `lower` is set).
+    """
+
+    def __init__(self, table, order, lower=False):
+        self.table = table
+        self.order = order
+        self.lower = lower
+
+    def key(self, position):
+        string = self.table[int(self.order[position])]
+        return string.lower() if self.lower else string
+
+    def first(self, key):
+        """Returns the first position whose string is not below `key`."""
+        low, high = 0, len(self.order)
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def insert(self, table, rows):
+        """
+        Returns a SortedIndex over `table`, which extends this index's
+        table with `rows`, by merging those rows into the order.
+        """
+        keys = [table[row].lower() if self.lower else table[row] for row in rows]
+        added = sorted(zip(keys, rows))
+        positions = [self.first(key) for key, _ in added]
+        order = np.insert(self.order, positions, [row for _, row in added])
+        return SortedIndex(table, order.astype(np.int32), self.lower)
+
+    def find(self, key):
+        """Returns the list of rows whose string equals `key`."""
+        if self.lower:
+            key = key.lower()
+        rows = []
+        position = self.first(key)
+        while position < len(self.order) and self.key(position) == key:
+            rows.append(int(self.order[position]))
+            position += 1
+        return rows
+
+
+def build_csr(rows, columns, size):
+    """
+    Builds CSR arrays (indptr, indices) for the edges `rows[i] -> columns[i]`
+    over `size` rows.
+    """
+    order = np.lexsort((columns, rows))
+    indices = columns[order].astype(np.int32)
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    return indptr, indices
+
+
+def gather(indptr, indices, rows):
+    """
+    Returns the concatenated adjacency lists of `rows` in a CSR structure,
+    together with the row that each entry came from.
+    """
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    owners = np.repeat(rows, counts)
+
+    # offset of every entry from the start of its own adjacency list
+    within = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return indices[np.repeat(starts, counts) + within], owners
+
+
+class Search():
+    """
+    Breadth-first search state for one side of a search over a CompactGraph.
+    """
+
+    def __init__(self, graph, start, stats=None):
+        self.graph = graph
+        self.start = start
+
+        # SearchStats to record expansions in, if any
+        self.stats = stats
+
+        # distance of every person from `start`, or -1 if not yet reached
+        self.depth = np.full(graph.person_count, -1, dtype=np.int32)
+
+        # movie each person was reached through, and the person
+        # each movie was reached from
+        self.person_movie = np.full(graph.person_count, -1, dtype=np.int32)
+        self.movie_person = np.full(graph.movie_count, -1, dtype=np.int32)
+
+        self.depth[start] = 0
+        self.layer = np.array([start], dtype=np.int32)
+        self.level = 0
+
+    def expand(self):
+        """
+        Expands the current layer and returns the newly reached people.
+        """
+        graph = self.graph
+        started = time.perf_counter()
+
+        # movies of the layer that have not been expanded before
+        movies, owners = graph.movies_for(self.layer)
+        fresh = self.movie_person[movies] < 0
+        movies, first = np.unique(movies[fresh], return_index=True)
+        self.movie_person[movies] = owners[fresh][first]
+
+        # stars of those movies that have not been reached before
+        stars, via = graph.stars_for(movies)
+        fresh = self.depth[stars] < 0
+        generated = len(stars)
+        stars, first = np.unique(stars[fresh], return_index=True)
+        self.person_movie[stars] = via[fresh][first]
+
+        if self.stats is not None:
+            self.stats.expanded += len(self.layer)
+            self.stats.generated += generated
+            self.stats.duplicates += generated - len(stars)
+            self.stats.neighbor_seconds += time.perf_counter() - started
+
+        self.level += 1
+        self.depth[stars] = self.level
+        self.layer = stars.astype(np.int32)
+        return self.layer
+
+    def nbytes(self):
+        """Returns the memory held by the search's arrays."""
+        return (self.depth.nbytes + self.person_movie.nbytes
+                + self.movie_person.nbytes)
+
+    def path_to(self, person):
+        """
+        Returns the (movie, person) steps from `start` to `person`.
+        """
+        steps = []
+        while person != self.start:
+            movie = int(self.person_movie[person])
+            steps.append((movie, person))
+            person = int(self.movie_person[movie])
+        steps.reverse()
+        return steps
+
+    def path_from(self, person):
+        """
+        Returns the (movie, person) steps from `person` back to `start`.
+        """
+        steps = []
+        while person != self.start:
+            movie = int(self.person_movie[person])
+            person = int(self.movie_person[movie])
+            steps.append((movie, person))
+        return steps
+
+
+# StringTable attributes of a CompactGraph
+STRING_TABLES = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years"
+)
+
+# plain array attributes of a CompactGraph
+ARRAYS = (
+    "person_movies_indptr", "person_movies",
+    "movie_stars_indptr", "movie_stars",
+    "components"
+)
+
+
+class CompactGraph():
+    """
+    Integer-indexed people, movies and star relation of the Degrees dataset.
+    """
+
+    def __init__(self, people, movies, person_movies, movie_stars,
+                 orders=None, components=None):
+        # (ids, names, births) and (ids, titles, years) StringTables
+        self.person_ids, self.person_names, self.person_births = people
+        self.movie_ids, self.movie_titles, self.movie_years = movies
+
+        # CSR adjacency from people to movies and from movies to stars
+        self.person_movies_indptr, self.person_movies = person_movies
+        self.movie_stars_indptr, self.movie_stars = movie_stars
+
+        # person and movie numbers of stars added since the CSR arrays
+        # were built, which searches read alongside them
+        self.added_people = np.zeros(0, dtype=np.int32)
+        self.added_movies = np.zeros(0, dtype=np.int32)
+
+        self.person_count = len(self.person_ids)
+        self.movie_count = len(self.movie_ids)
+
+        # sorted orders of person ids, movie ids and lowercase names
+        if orders is None:
+            orders = (
+                sort_order(list_strings(self.person_ids)),
+                sort_order(list_strings(self.movie_ids)),
+                sort_order([name.lower()
+                            for name in list_strings(self.person_names)])
+            )
+        self.person_lookup = SortedIndex(self.person_ids, orders[0])
+        self.movie_lookup = SortedIndex(self.movie_ids, orders[1])
+        self.name_lookup = SortedIndex(self.person_names, orders[2], lower=True)
+
+        # connected component label of every person
+        if components is None:
+            components = self.label_components()
+        self.components = components
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Builds a CompactGraph from the people, movies and stars CSV files.
+        """
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            people = [(row["id"], row["name"], row["birth"])
+                      for row in csv.DictReader(f)]
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            movies = [(row["id"], row["title"], row["year"])
+                      for row in csv.DictReader(f)]
+
+        # number people and movies in file order
+        person_index = {row[0]: i for i, row in enumerate(people)}
+        movie_index = {row[0]: i for i, row in enumerate(movies)}
+
+        # keep only stars whose person and movie are both known
+        person_rows, movie_rows = [], []
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person = person_index.get(row["person_id"])
+                movie = movie_index.get(row["movie_id"])
+                if person is not None and movie is not None:
+                    person_rows.append(person)
+                    movie_rows.append(movie)
+
+        return cls.from_rows(people, movies, person_rows, movie_rows)
+
+    @classmethod
+    def from_rows(cls, people, movies, person_rows, movie_rows):
+        """
+        Builds a CompactGraph from (id, name, birth) people, (id, title, year)
+        movies and parallel lists of person and movie numbers for stars.
+        """
+        people = [StringTable.from_strings(column) for column in zip(*people)] \
+            or [StringTable.from_strings([])] * 3
+        movies = [StringTable.from_strings(column) for column in zip(*movies)] \
+            or [StringTable.from_strings([])] * 3
+        person_count, movie_count = len(people[0]), len(movies[0])
+
+        # drop duplicate star rows, as the set-based loader does
+        pairs = np.unique(
+            np.array(person_rows, dtype=np.int64) * movie_count
+            + np.array(movie_rows, dtype=np.int64)
+        )
+        person_rows, movie_rows = pairs // movie_count, pairs % movie_count
+
+        return cls(
+            people, movies,
+            build_csr(person_rows, movie_rows, person_count),
+            build_csr(movie_rows, person_rows, movie_count)
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Builds a CompactGraph from the arrays returned by `arrays`,
+        such as memory-mapped arrays loaded from a snapshot.
+        """
+        tables = [StringTable(arrays[f"{name}_data"], arrays[f"{name}_offsets"])
+                  for name in STRING_TABLES]
+        return cls(
+            tables[:3], tables[3:],
+            (arrays["person_movies_indptr"], arrays["person_movies"]),
+            (arrays["movie_stars_indptr"], arrays["movie_stars"]),
+            orders=(arrays["person_order"], arrays["movie_order"],
+                    arrays["name_order"]),
+            components=arrays["components"]
+        )
+
+    def arrays(self):
+        """
+        Returns every array backing the graph, keyed by name, merging
+        any added stars into the CSR arrays first.
+        """
+        self.merge()
+        arrays = {}
+        for name in STRING_TABLES:
+            table = getattr(self, name)
+            arrays[f"{name}_data"] = table.data
+            arrays[f"{name}_offsets"] = table.offsets
+        for name in ARRAYS:
+            arrays[name] = getattr(self, name)
+        arrays["person_order"] = self.person_lookup.order
+        arrays["movie_order"] = self.movie_lookup.order
+        arrays["name_order"] = self.name_lookup.order
+        return arrays
+
+    def edges(self):
+        """Returns parallel arrays of the person and movie of every star."""
+        counts = np.diff(self.person_movies_indptr)
+        people = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+        return (np.concatenate([people, self.added_people]),
+                np.concatenate([self.person_movies, self.added_movies]))
+
+    def extend(self, people, movies, stars):
+        """
+        Adds (id, name, birth) people, (id, title, year) movies and
+        (person_id, movie_id) stars in place, numbering new people and
+        movies after the existing ones. Rows for ids already present and
+        stars of unknown people or movies are skipped, and connected
+        components are patched rather than relabelled from scratch.
+
+        New stars are kept beside the CSR arrays until MERGE_LIMIT of
+        them have built up, so small updates do not rebuild the arrays.
+        """
+        people = new_rows(people, self.person_lookup)
+        movies = new_rows(movies, self.movie_lookup)
+        person_base, movie_base = self.person_count, self.movie_count
+        person_index = {row[0]: person_base + i for i, row in enumerate(people)}
+        movie_index = {row[0]: movie_base + i for i, row in enumerate(movies)}
+
+        # append the new strings and merge them into the sorted lookups
+        if people:
+            ids, names, births = (list(column) for column in zip(*people))
+            self.person_ids = self.person_ids.extend(ids)
+            self.person_names = self.person_names.extend(names)
+            self.person_births = self.person_births.extend(births)
+            rows = range(person_base, person_base + len(people))
+            self.person_lookup = self.person_lookup.insert(self.person_ids, rows)
+            self.name_lookup = self.name_lookup.insert(self.person_names, rows)
+        if movies:
+            ids, titles, years = (list(column) for column in zip(*movies))
+            self.movie_ids = self.movie_ids.extend(ids)
+            self.movie_titles = self.movie_titles.extend(titles)
+            self.movie_years = self.movie_years.extend(years)
+            rows = range(movie_base, movie_base + len(movies))
+            self.movie_lookup = self.movie_lookup.insert(self.movie_ids, rows)
+        self.person_count = len(self.person_ids)
+        self.movie_count = len(self.movie_ids)
+
+        # new people and movies start with no stars in the CSR arrays
+        self.person_movies_indptr = pad_indptr(self.person_movies_indptr,
+                                               self.person_count)
+        self.movie_stars_indptr = pad_indptr(self.movie_stars_indptr,
+                                             self.movie_count)
+
+        # resolve the new stars, skipping unknown people and movies and
+        # stars the graph already has
+        added = set()
+        for person_id, movie_id in stars:
+            try:
+                person = person_index.get(person_id)
+                person = self.person(person_id) if person is None else person
+                movie = movie_index.get(movie_id)
+                movie = self.movie(movie_id) if movie is None else movie
+            except KeyError:
+                continue
+            if (person, movie) not in added and movie not in self.movies_of(person):
+                added.add((person, movie))
+        person_rows = np.array([person for person, _ in added], dtype=np.int32)
+        movie_rows = np.array([movie for _, movie in added], dtype=np.int32)
+        self.added_people = np.concatenate([self.added_people, person_rows])
+        self.added_movies = np.concatenate([self.added_movies, movie_rows])
+
+        # new people start alone, then the cast of every movie with
+        # new stars is joined into one component
+        labels = np.concatenate([
+            self.components,
+            np.arange(person_base, self.person_count, dtype=np.int32)
+        ])
+        merged = UnionFind()
+        for movie in set(movie_rows.tolist()):
+            cast = [int(label) for label in np.unique(labels[self.stars_of(movie)])]
+            for label in cast:
+                merged.add(label)
+                merged.union(cast[0], label)
+
+        # label each merged component by its lowest person number
+        lowest = {}
+        for label in merged.parent:
+            root = merged.find(label)
+            lowest[root] = min(lowest.get(root, label), label)
+        relabel = np.arange(self.person_count, dtype=np.int32)
+        for label in merged.parent:
+            relabel[label] = lowest[merged.find(label)]
+        self.components = relabel[labels]
+
+        if len(self.added_people) > MERGE_LIMIT:
+            self.merge()
+
+    def merge(self):
+        """
+        Rebuilds the CSR arrays to include the stars added by `extend`.
+        """
+        if not len(self.added_people):
+            return
+        person_rows, movie_rows = self.edges()
+        self.person_movies_indptr, self.person_movies = build_csr(
+            person_rows, movie_rows, self.person_count)
+        self.movie_stars_indptr, self.movie_stars = build_csr(
+            movie_rows, person_rows, self.movie_count)
+        self.added_people = np.zeros(0, dtype=np.int32)
+        self.added_movies = np.zeros(0, dtype=np.int32)
+
+    def label_components(self):
+        """
+        Returns the connected component label of every person, the lowest
+        person number in their component, by propagating minimum labels
+        through movies with pointer jumping until they settle.
+        """
+        labels = np.arange(self.person_count, dtype=np.int32)
+        movie_counts = np.diff(self.movie_stars_indptr)
+        person_counts = np.diff(self.person_movies_indptr)
+        cast = movie_counts > 0
+        starring = person_counts > 0
+
+        while True:
+            # lowest label among each movie's stars
+            movie_labels = np.full(self.movie_count, self.person_count,
+                                   dtype=np.int32)
+            movie_labels[cast] = np.minimum.reduceat(
+                labels[self.movie_stars], self.movie_stars_indptr[:-1][cast]
+            )
+
+            # lowest label among each person's movies, then jump pointers
+            updated = labels.copy()
+            updated[starring] = np.minimum(updated[starring], np.minimum.reduceat(
+                movie_labels[self.person_movies],
+                self.person_movies_indptr[:-1][starring]
+            ))
+            updated = updated[updated]
+
+            if np.array_equal(updated, labels):
+                return labels
+            labels = updated
+
+    def component_sizes(self):
+        """Returns the sizes of all connected components."""
+        sizes = np.bincount(self.components, minlength=self.person_count)
+        return [int(size) for size in sizes[sizes > 0]]
+
+    def person(self, person_id):
+        """Returns the number of the person with IMDB id `person_id`."""
+        rows = self.person_lookup.find(person_id)
+        if not rows:
+            raise KeyError(person_id)
+        return rows[0]
+
+    def movie(self, movie_id):
+        """Returns the number of the movie with IMDB id `movie_id`."""
+        rows = self.movie_lookup.find(movie_id)
+        if not rows:
+            raise KeyError(movie_id)
+        return rows[0]
+
+    def movies_of(self, person):
+        """Returns the movie numbers a person starred in."""
+        indptr = self.person_movies_indptr
+        movies = self.person_movies[indptr[person]:indptr[person + 1]]
+        if len(self.added_people):
+            movies = np.concatenate([movies,
+                                     self.added_movies[self.added_people == person]])
+        return movies
+
+    def stars_of(self, movie):
+        """Returns the person numbers who starred in a movie."""
+        indptr = self.movie_stars_indptr
+        stars = self.movie_stars[indptr[movie]:indptr[movie + 1]]
+        if len(self.added_movies):
+            stars = np.concatenate([stars,
+                                    self.added_people[self.added_movies == movie]])
+        return stars
+
+    def movies_for(self, people):
+        """
+        Returns the movies of every person in the array `people`,
+        together with the person each movie came from.
+        """
+        movies, owners = gather(self.person_movies_indptr, self.person_movies, people)
+        if len(self.added_people):
+            added = np.isin(self.added_people, people)
+            movies = np.concatenate([movies, self.added_movies[added]])
+            owners = np.concatenate([owners, self.added_people[added]])
+        return movies, owners
+
+    def stars_for(self, movies):
+        """
+        Returns the stars of every movie in the array `movies`,
+        together with the movie each star came from.
+        """
+        stars, owners = gather(self.movie_stars_indptr, self.movie_stars, movies)
+        if len(self.added_movies):
+            added = np.isin(self.added_movies, movies)
+            stars = np.concatenate([stars, self.added_people[added]])
+            owners = np.concatenate([owners, self.added_movies[added]])
+        return stars, owners
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) number pairs for people who starred
+        with person number `person`.
+        """
+        stars, movies = self.stars_for(self.movies_of(person))
+        return list(zip(movies.tolist(), stars.tolist()))
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        stars, owners = self.stars_for(self.movies_of(self.person(person_id)))
+        return {(self.movie_ids[int(movie)], self.person_ids[int(star)])
+                for movie, star in zip(owners, stars)}
+
+    def shortest_path(self, source, target, bidirectional=True, stats=None):
+        """
+        Returns the shortest list of (movie, person) number pairs
+        that connect person `source` to person `target`, searching
+        a whole layer at a time over the CSR arrays, and recording
+        into `stats` unless it is None.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return []
+
+        forward = Search(self, source, stats)
+        if not bidirectional:
+            while len(forward.layer):
+                forward.expand()
+                if stats is not None:
+                    stats.frontier_size(len(forward.layer))
+                if forward.depth[target] >= 0:
+                    return forward.path_to(target)
+            return None
+
+        # expand the smaller side until the two searches meet
+        backward = Search(self, target, stats)
+        while len(forward.layer) and len(backward.layer):
+            if len(forward.layer) <= len(backward.layer):
+                side, other = forward, backward
+            else:
+                side, other = backward, forward
+            reached = side.expand()
+            if stats is not None:
+                stats.frontier_size(len(forward.layer) + len(backward.layer))
+
+            # join at the meeting person nearest the other side's start
+            met = reached[other.depth[reached] >= 0]
+            if len(met):
+                meeting = int(met[np.argmin(other.depth[met])])
+                return forward.path_to(meeting) + backward.path_from(meeting)
+
+        return None
+
+    def shortest_path_dag(self, source, target):
+        """
+        Returns a function giving, for each person no farther from `source`
+        than `target`, every (movie, person) step that reaches them from
+        a person one step closer to `source`. Steps are worked out from
+        the search's depths when first asked for, then remembered.
+        """
+        search = Search(self, source)
+        while len(search.layer) and search.depth[target] < 0:
+            search.expand()
+        depth = search.depth
+        parents = {}
+
+        def parents_of(person):
+            if person not in parents:
+                stars, movies = self.stars_for(self.movies_of(person))
+                closer = depth[stars] == depth[person] - 1
+                parents[person] = [(int(movie), int(star)) for movie, star
+                                   in zip(movies[closer], stars[closer])]
+            return parents[person]
+
+        return parents_of
+
+    def search_tree(self, source, stats=None):
+        """
+        Returns a Search from person `source` expanded until everyone
+        connected to them has been reached.
+        """
+        tree = Search(self, source, stats)
+        while len(tree.layer):
+            tree.expand()
+            if stats is not None:
+                stats.frontier_size(len(tree.layer))
+        tree.stats = None
+        return tree
+
+    def views(self):
+        """
+        Returns read-only `names`, `people` and `movies` mappings over the
+        graph with the same shape as the dictionaries built by `load_data`.
+        """
+        return NamesView(self), PeopleView(self), MoviesView(self)
+
+
+def list_strings(table):
+    """Returns every string of a StringTable as a list."""
+    return [table[i] for i in range(len(table))]
+
+
+def pad_indptr(indptr, size):
+    """
+    Returns CSR row pointers extended to `size` rows, the new rows empty.
+    """
+    added = size + 1 - len(indptr)
+    if added <= 0:
+        return indptr
+    return np.concatenate([indptr, np.full(added, indptr[-1], dtype=indptr.dtype)])
+
+
+def new_rows(rows, lookup):
+    """
+    Returns the rows whose id (first field) is not yet in `lookup`,
+    keeping the first of any repeated id.
+    """
+    unique = {}
+    for row in rows:
+        unique.setdefault(row[0], tuple(row))
+    return [row for row in unique.values() if not lookup.find(row[0])]
+
+
+def sort_order(strings):
+    """Returns the permutation that sorts `strings`, as an array."""
+    order = sorted(range(len(strings)), key=strings.__getitem__)
+    return np.array(order, dtype=np.int32)
+
+
+class NamesView(Mapping):
+    """
+    Maps lowercase names to sets of person_ids.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        rows = self.graph.name_lookup.find(name)
+        if not rows:
+            raise KeyError(name)
+        return {self.graph.person_ids[row] for row in rows}
+
+    def __iter__(self):
+        lookup = self.graph.name_lookup
+        previous = None
+        for position in range(len(lookup.order)):
+            name = lookup.key(position)
+            if name != previous:
+                yield name
+            previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class PeopleView(Mapping):
+    """
+    Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids).
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person(person_id)
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[int(movie)]
+                       for movie in graph.movies_of(person)}
+        }
+
+    def __iter__(self):
+        return iter(list_strings(self.graph.person_ids))
+
+    def __len__(self):
+        return self.graph.person_count
+
+
+class MoviesView(Mapping):
+    """
+    Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids).
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie(movie_id)
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[int(star)]
+                      for star in graph.stars_of(movie)}
+        }
+
+    def __iter__(self):
+        return iter(list_strings(self.graph.movie_ids))
+
+    def __len__(self):
+        return self.graph.movie_count
@@ -1,7 +1,20 @@
 import csv
+import heapq
+import itertools
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+from nameindex import NameIndex
+from landmarks import LONGEST, UNREACHED, Landmarks, encode, farthest
+from util import (Node, StackFrontier, QueueFrontier, DequeQueueFrontier,
+                  SearchStats, TreeCache, UnionFind, append_update,
+                  read_updates, source_stamps)
+
+# Search strategies accepted by shortest_path
+SEARCH_MODES = ("bfs", "bidirectional", "tree", "astar")
+
+# Memory allowed for cached search trees used by the "tree" mode
+TREE_CACHE_BYTES = 256 * 1024 * 1024
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +25,71 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, used instead of the dictionaries above
+# when data is loaded with compact=True
+graph = None
+
+# Breadth-first search trees of recent sources, for the "tree" mode
+tree_cache = TreeCache(TREE_CACHE_BYTES)
+
+# Connected components of people, for the dictionaries above
+components = UnionFind()
+
+# Landmark distance tables for the "astar" mode, and the row of each
+# person_id in those tables when using the dictionaries
+landmarks = None
+person_rows = None
+
+# Prefix and fuzzy index over the keys of `names`, built on first use
+name_index = None
+
+# Directory the data was loaded from, and the stamps of its CSV files
+# and update log, or None once data has been added that they do not hold
+data_directory = None
+data_stamps = None
+
+# Where the snapshot of compact data is kept, None for inside the data
+# directory, and whether the loaded graph is in an up-to-date snapshot
+# that other processes can map
+snapshot_path = None
+snapshot_ready = False
 
-def load_data(directory):
+# Functions called with the SearchStats of every shortest_path query
+profile_hooks = []
+
+
+def load_data(directory, compact=False, snapshot=True, path=None):
     """
     Load data from CSV files into memory.
+
+    With `compact`, the data is held in a CompactGraph of integer arrays
+    and `names`, `people` and `movies` become read-only views over it.
+    The compact graph is then also cached in a binary snapshot, at `path`
+    if given or else inside `directory`, which later loads use instead
+    of the CSV files unless `snapshot` is False.
+
+    Either way, updates persisted with add_data(persist=True) are
+    applied on top of the CSV files.
     """
+    global graph, names, people, movies
+    global landmarks, person_rows, name_index, data_directory, data_stamps
+    global snapshot_path, snapshot_ready
+
+    # trees, landmarks and name lookups from earlier data no longer apply
+    tree_cache.clear()
+    landmarks = person_rows = name_index = None
+    data_directory = directory
+    data_stamps = source_stamps(directory)
+    snapshot_path = path
+    snapshot_ready = False
+
+    if compact:
+        return load_compact(directory, snapshot)
+
+    # drop any compact graph, and the read-only views over it
+    graph = None
+    names, people, movies = {}, {}, {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,6 +124,182 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    # Label connected components
+    label_components()
+
+    # Apply persisted updates
+    for update in read_updates(directory):
+        add_rows(*update)
+
+
+def label_components():
+    """
+    Rebuilds `components` from the dictionaries, joining everyone
+    who starred in the same movie.
+    """
+    components.clear()
+    for person_id in people:
+        components.add(person_id)
+    for movie in movies.values():
+        stars = iter(movie["stars"])
+        first = next(stars, None)
+        for person_id in stars:
+            components.union(first, person_id)
+
+
+def connected(source, target):
+    """
+    Returns True if some path connects the source to the target.
+    """
+    if graph is not None:
+        labels = graph.components
+        return labels[graph.person(source)] == labels[graph.person(target)]
+    return components.find(source) == components.find(target)
+
+
+def component_sizes():
+    """
+    Returns the sizes of all connected components, largest first.
+    """
+    if graph is not None:
+        sizes = graph.component_sizes()
+    else:
+        sizes = components.sizes.values()
+    return sorted(sizes, reverse=True)
+
+
+def load_compact(directory, use_snapshot=True):
+    """
+    Load data into a CompactGraph, from an up-to-date snapshot if there
+    is one or else from the CSV files, writing a new snapshot. A snapshot
+    that cannot be written is warned about on stderr and left unset in
+    `snapshot_ready`.
+    """
+    global graph, names, people, movies, snapshot_ready
+
+    # numpy is only needed for the compact representation
+    from compact import CompactGraph
+    import snapshot
+
+    graph = snapshot.load(directory, snapshot_path) if use_snapshot else None
+    snapshot_ready = graph is not None
+    if graph is None:
+        graph = CompactGraph.from_csv(directory)
+        for update in read_updates(directory):
+            add_rows(*update)
+        if use_snapshot:
+            try:
+                snapshot.save(graph, directory, snapshot_path)
+                snapshot_ready = True
+            except OSError as e:
+                print(f"Could not write snapshot: {e}", file=sys.stderr)
+    names, people, movies = graph.views()
+
+
+def add_data(people_rows=(), movie_rows=(), star_rows=(), persist=False):
+    """
+    Adds people, movies and stars to the loaded data without reloading it.
+
+    Rows are dictionaries with the same fields as the CSV files. Cached
+    search trees and name lookups are dropped, connected components are
+    patched, and landmarks are dropped if new stars were added (new paths
+    could make their bounds too high) or else extended to new people.
+
+    With `persist`, the rows are also appended to the update log of the
+    data directory, which later loads apply, and the snapshot of compact
+    data is rewritten to include them.
+    """
+    global landmarks, person_rows, name_index, data_stamps
+
+    people_rows, movie_rows, star_rows = (
+        list(people_rows), list(movie_rows), list(star_rows)
+    )
+    people_before = len(people)
+    add_rows(people_rows, movie_rows, star_rows)
+
+    # the data still matches its files only if it did before and
+    # these rows are now in the log too
+    if persist:
+        if data_directory is None:
+            raise Exception("no data directory to persist updates to")
+        append_update(data_directory, people_rows, movie_rows, star_rows)
+        if graph is not None:
+            import snapshot
+            snapshot.save(graph, data_directory, snapshot_path)
+    if persist and data_stamps is not None:
+        data_stamps = source_stamps(data_directory)
+    else:
+        data_stamps = None
+
+    # new people or stars change search trees and name lookups
+    tree_cache.clear()
+    name_index = person_rows = None
+
+    if landmarks is not None:
+        if star_rows:
+            landmarks = None
+        else:
+            added = bytes([UNREACHED]) * (len(people) - people_before)
+            landmarks.tables = [table + added for table in landmarks.tables]
+            landmarks.sources = None
+
+
+def add_rows(people_rows, movie_rows, star_rows):
+    """
+    Adds people, movies and stars rows to the compact graph or the
+    dictionaries, patching connected components.
+    """
+    if graph is not None:
+        graph.extend(
+            [(row["id"], row["name"], row["birth"]) for row in people_rows],
+            [(row["id"], row["title"], row["year"]) for row in movie_rows],
+            [(row["person_id"], row["movie_id"]) for row in star_rows]
+        )
+        return
+
+    for row in people_rows:
+        if row["id"] in people:
+            continue
+        people[row["id"]] = {
+            "name": row["name"],
+            "birth": row["birth"],
+            "movies": set()
+        }
+        names.setdefault(row["name"].lower(), set()).add(row["id"])
+        components.add(row["id"])
+    for row in movie_rows:
+        if row["id"] in movies:
+            continue
+        movies[row["id"]] = {
+            "title": row["title"],
+            "year": row["year"],
+            "stars": set()
+        }
+    for row in star_rows:
+        try:
+            stars = movies[row["movie_id"]]["stars"]
+            people[row["person_id"]]["movies"].add(row["movie_id"])
+        except KeyError:
+            continue
+        if stars:
+            components.union(next(iter(stars)), row["person_id"])
+        stars.add(row["person_id"])
+
+
+def load_updates(directory, persist=False):
+    """
+    Adds the rows of whichever of people.csv, movies.csv and stars.csv
+    exist in `directory` to the loaded data, using `add_data`.
+    """
+    rows = {}
+    for name in ("people", "movies", "stars"):
+        try:
+            with open(f"{directory}/{name}.csv", encoding="utf-8") as f:
+                rows[name] = list(csv.DictReader(f))
+        except FileNotFoundError:
+            rows[name] = []
+    add_data(rows["people"], rows["movies"], rows["stars"], persist)
+
 
 def main():
     if len(sys.argv) > 2:
@@ -59,7 +308,7 @@ def main():
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact=True)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +318,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, mode="bidirectional")
 
     if path is None:
         print("Not connected.")
@@ -84,16 +333,91 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, mode="bfs", stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    `mode` picks the search strategy: "bfs" searches outwards from
+    the source only, "bidirectional" searches from both ends and
+    "tree" reads the path off a cached search tree of the source and
+    "astar" runs A* guided by the landmark tables (see build_landmarks).
+
+    If `stats` is a SearchStats, or any profile hooks are registered,
+    the query's counters and timings are recorded and passed to the hooks.
+
     If no possible path, returns None.
     """
+    if mode not in SEARCH_MODES:
+        raise Exception(f"unknown search mode: {mode}")
+
+    if stats is None and profile_hooks:
+        stats = SearchStats()
+    if stats is None:
+        return search(source, target, mode, None)
+
+    stats.mode = mode
+    start = time.perf_counter()
+    path = search(source, target, mode, stats)
+    stats.finish(time.perf_counter() - start, path)
+    for hook in profile_hooks:
+        hook(stats)
+    return path
+
+
+def shortest_path_with_stats(source, target, mode="bfs"):
+    """
+    Returns the shortest path as shortest_path does, together with
+    the SearchStats of the query.
+    """
+    stats = SearchStats()
+    path = shortest_path(source, target, mode, stats)
+    return path, stats
+
+
+def add_profile_hook(hook):
+    """
+    Registers a function to be called with the SearchStats of every
+    shortest_path query, such as a list's append to aggregate them.
+    """
+    profile_hooks.append(hook)
+
+
+def remove_profile_hook(hook):
+    """
+    Unregisters a function added with add_profile_hook.
+    """
+    profile_hooks.remove(hook)
+
+
+def search(source, target, mode, stats):
+    """
+    Runs the shortest_path search for `mode`, recording into `stats`
+    unless it is None.
+    """
+
+    # people in different components are never connected
+    if not connected(source, target):
+        return None
+
+    if mode == "tree":
+        return tree_path(source, target, stats)
+    if mode == "astar":
+        return astar_path(source, target, stats)
+
+    # search the integer arrays directly when the graph is compact
+    if graph is not None:
+        path = graph.shortest_path(
+            graph.person(source), graph.person(target),
+            bidirectional=mode == "bidirectional", stats=stats
+        )
+        return compact_path_ids(path)
+
+    if mode == "bidirectional":
+        return bidirectional_path(source, target, stats)
 
     # Create a frontier
-    frontier = QueueFrontier()
+    frontier = DequeQueueFrontier()
 
     # explored states
     explored = set()
@@ -142,15 +466,514 @@ def shortest_path(source, target):
 
         
         # expand nodes
-        neighbors = neighbors_for_person(node.state)
+        neighbors = expand(node.state, stats)
         parent = node.state
         for action, state in neighbors:
             
             if state in explored or frontier.contains_state(state):
+                if stats is not None:
+                    stats.duplicates += 1
                 continue
 
             frontier.add(Node(state=state, parent=node, action=action))
-        
+
+        if stats is not None:
+            stats.frontier_size(len(frontier.frontier))
+
+
+def expand(person_id, stats, neighbors_of=None):
+    """
+    Returns neighbors_for_person(person_id), or neighbors_of(person_id)
+    if given, recording the expansion and the time it took in `stats`
+    unless it is None.
+    """
+    if neighbors_of is None:
+        neighbors_of = neighbors_for_person
+    if stats is None:
+        return neighbors_of(person_id)
+
+    start = time.perf_counter()
+    neighbors = neighbors_of(person_id)
+    stats.neighbor_seconds += time.perf_counter() - start
+    stats.expanded += 1
+    stats.generated += len(neighbors)
+    return neighbors
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, one at a time.
+
+    The paths are read lazily off a shortest-path DAG built by one
+    breadth-first search, in which each person keeps every step that
+    reaches them from the previous layer, so memory depends on the size
+    of the graph rather than on how many paths there are.
+    """
+    if not connected(source, target):
+        return
+
+    if graph is not None:
+        source, target = graph.person(source), graph.person(target)
+        parents_of = graph.shortest_path_dag(source, target)
+        for path in dag_paths(parents_of, source, target):
+            yield compact_path_ids(path)
+        return
+
+    yield from dag_paths(shortest_path_dag(source, target), source, target)
+
+
+def shortest_paths(source, target, k):
+    """
+    Returns a list of at most `k` shortest paths from the source
+    to the target, as yielded by all_shortest_paths.
+    """
+    return list(itertools.islice(all_shortest_paths(source, target), k))
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns how many shortest paths connect the source to the target,
+    without listing them.
+    """
+    if not connected(source, target):
+        return 0
+
+    if graph is not None:
+        source, target = graph.person(source), graph.person(target)
+        parents_of = graph.shortest_path_dag(source, target)
+    else:
+        parents_of = shortest_path_dag(source, target)
+
+    # count paths to each person from the counts of their parents
+    counts = {source: 1}
+
+    def count(person):
+        if person not in counts:
+            counts[person] = sum(count(parent) for _, parent in parents_of(person))
+        return counts[person]
+
+    return count(target)
+
+
+def shortest_path_dag(source, target):
+    """
+    Returns a function giving, for each person no farther from the source
+    than the target, every (movie_id, person_id) step that reaches them
+    from a person one step closer to the source.
+    """
+    depth = {source: 0}
+    parents = {source: []}
+    layer = [source]
+
+    # finish the target's whole layer so it gets all of its parents
+    while layer and target not in depth:
+        next_layer = []
+        for person_id in layer:
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor not in depth:
+                    depth[neighbor] = depth[person_id] + 1
+                    parents[neighbor] = []
+                    next_layer.append(neighbor)
+                if depth[neighbor] == depth[person_id] + 1:
+                    parents[neighbor].append((movie_id, person_id))
+        layer = next_layer
+
+    return parents.__getitem__
+
+
+def dag_paths(parents_of, source, target):
+    """
+    Yields every path from the source to the target in a shortest-path
+    DAG given by `parents_of`, walking depth-first back from the target
+    so only the path being built is held at a time.
+    """
+    if source == target:
+        yield []
+        return
+
+    # steps from the target back towards the source, the people those
+    # steps lead back from, and the unexplored parents of each person
+    steps = []
+    people_on_path = [target]
+    unexplored = [iter(parents_of(target))]
+
+    while unexplored:
+        step = next(unexplored[-1], None)
+
+        # all parents of this person are done; step back towards the target
+        if step is None:
+            unexplored.pop()
+            people_on_path.pop()
+            if steps:
+                steps.pop()
+            continue
+
+        movie, parent = step
+        steps.append((movie, people_on_path[-1]))
+        if parent == source:
+            yield steps[::-1]
+            steps.pop()
+        else:
+            people_on_path.append(parent)
+            unexplored.append(iter(parents_of(parent)))
+
+
+def compact_path_ids(path):
+    """
+    Converts a path of (movie, person) numbers in the compact graph
+    into (movie_id, person_id) pairs.
+    """
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path]
+
+
+def tree_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that connect
+    the source to the target by walking the target's parent pointers in
+    the source's breadth-first search tree, which is built and cached
+    on the first query from that source.
+
+    If no possible path, returns None.
+    """
+    tree = tree_cache.get(source)
+    if tree is None:
+        tree, size = search_tree(source, stats)
+        tree_cache.put(source, tree, size)
+
+    if graph is not None:
+        target = graph.person(target)
+        if tree.depth[target] < 0:
+            return None
+        return compact_path_ids(tree.path_to(target))
+
+    if target not in tree:
+        return None
+    path = []
+    while tree[target] is not None:
+        movie_id, parent = tree[target]
+        path.append((movie_id, target))
+        target = parent
+    path.reverse()
+    return path
+
+
+def search_tree(source, stats=None):
+    """
+    Returns the breadth-first search tree of everyone connected to the
+    source, with its approximate size in bytes.
+
+    For the dictionaries, the tree maps each person to the
+    (movie_id, person_id) step towards the source, or None for the
+    source itself. For a compact graph it is an exhausted compact Search.
+    """
+    if graph is not None:
+        tree = graph.search_tree(graph.person(source), stats)
+        return tree, tree.nbytes()
+
+    tree = {source: None}
+    layer = [source]
+    while layer:
+        next_layer = []
+        for person_id in layer:
+            for movie_id, neighbor in expand(person_id, stats):
+                if neighbor not in tree:
+                    tree[neighbor] = (movie_id, person_id)
+                    next_layer.append(neighbor)
+                elif stats is not None:
+                    stats.duplicates += 1
+        layer = next_layer
+        if stats is not None:
+            stats.frontier_size(len(layer))
+
+    return tree, sys.getsizeof(tree) + len(tree) * sys.getsizeof((None, None))
+
+
+def astar_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that connect
+    the source to the target, using A* with landmark lower bounds on the
+    remaining distance as the heuristic.
+
+    On a compact graph the search runs over person and movie numbers,
+    which are also the rows of the landmark tables, and only the path
+    found is converted back to ids.
+
+    If no possible path, returns None.
+    """
+    if landmarks is None:
+        raise Exception("no landmarks; call build_landmarks or load_landmarks")
+
+    if graph is not None:
+        source, target = graph.person(source), graph.person(target)
+        neighbors_of, row = graph.neighbors, int
+    else:
+        neighbors_of, row = neighbors_for_person, person_row
+    target_row = row(target)
+
+    # maps each reached person to its distance and to the
+    # (movie_id, person_id) step leading back towards the source
+    cost = {source: 0}
+    parents = {source: None}
+    explored = set()
+
+    # the counter breaks ties between equal estimates
+    counter = itertools.count()
+    frontier = [(landmarks.bound(row(source), target_row), next(counter), source)]
+
+    while frontier:
+        _, _, person_id = heapq.heappop(frontier)
+
+        if person_id == target:
+            path = []
+            while parents[person_id] is not None:
+                movie_id, parent = parents[person_id]
+                path.append((movie_id, person_id))
+                person_id = parent
+            path.reverse()
+            return compact_path_ids(path) if graph is not None else path
+
+        if person_id in explored:
+            continue
+        explored.add(person_id)
+
+        distance = cost[person_id] + 1
+        for movie_id, neighbor in expand(person_id, stats, neighbors_of):
+            if neighbor in explored or distance >= cost.get(neighbor, distance + 1):
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+            cost[neighbor] = distance
+            parents[neighbor] = (movie_id, person_id)
+            estimate = distance + landmarks.bound(row(neighbor), target_row)
+            heapq.heappush(frontier, (estimate, next(counter), neighbor))
+
+        if stats is not None:
+            stats.frontier_size(len(frontier))
+
+    return None
+
+
+def person_row(person_id):
+    """
+    Returns the row of a person in people.csv order, as used by
+    the landmark tables.
+    """
+    global person_rows
+
+    if graph is not None:
+        return graph.person(person_id)
+    if person_rows is None:
+        person_rows = {person_id: row for row, person_id in enumerate(people)}
+    return person_rows[person_id]
+
+
+def distance_table(person_id):
+    """
+    Returns the landmark table of breadth-first distances from a person.
+    """
+    if graph is not None:
+        depth = graph.search_tree(graph.person(person_id)).depth
+        table = depth.clip(0, LONGEST).astype("uint8")
+        table[depth < 0] = UNREACHED
+        return table.tobytes()
+
+    distances = {person_id: 0}
+    layer = [person_id]
+    while layer:
+        next_layer = []
+        for person_id in layer:
+            for _, neighbor in neighbors_for_person(person_id):
+                if neighbor not in distances:
+                    distances[neighbor] = distances[person_id] + 1
+                    next_layer.append(neighbor)
+        layer = next_layer
+
+    return encode(
+        ((person_row(person_id), distance)
+         for person_id, distance in distances.items()),
+        len(people)
+    )
+
+
+def build_landmarks(count=16, landmark_ids=None):
+    """
+    Precomputes the landmark tables used by the "astar" mode, from
+    `landmark_ids` if given, or else from `count` landmarks picked
+    farthest-first starting from the person in the most movies.
+    Returns the Landmarks, which can be saved with `Landmarks.save`.
+    """
+    global landmarks
+
+    tables = []
+    if landmark_ids is not None:
+        tables = [distance_table(person_id) for person_id in landmark_ids]
+    elif len(people) > 0:
+        landmark_ids = [max(people, key=movie_count)]
+        tables.append(distance_table(landmark_ids[0]))
+        while len(landmark_ids) < count:
+            person_id = person_at(farthest(tables))
+            if person_id in landmark_ids:
+                break
+            landmark_ids.append(person_id)
+            tables.append(distance_table(person_id))
+    else:
+        landmark_ids = []
+
+    landmarks = Landmarks(landmark_ids, tables, data_stamps)
+    return landmarks
+
+
+def load_landmarks(path):
+    """
+    Loads landmark tables saved with `Landmarks.save` for the "astar" mode.
+
+    Stale tables could overestimate distances and make A* return longer
+    paths, so the tables must have been built from the same CSV files,
+    unchanged since, and must agree with the loaded people.
+    """
+    global landmarks
+
+    loaded = Landmarks.load(path)
+    if data_stamps is None or loaded.sources != data_stamps:
+        raise Exception("landmarks were not built from the loaded data files")
+    if loaded.tables and loaded.size() != len(people):
+        raise Exception("landmarks do not match the loaded data")
+    for person_id, table in zip(loaded.landmarks, loaded.tables):
+        if person_id not in people or table[person_row(person_id)] != 0:
+            raise Exception("landmarks do not match the loaded data")
+    landmarks = loaded
+    return landmarks
+
+
+def movie_count(person_id):
+    """
+    Returns how many movies a person starred in.
+    """
+    if graph is not None:
+        return len(graph.movies_of(graph.person(person_id)))
+    return len(people[person_id]["movies"])
+
+
+def person_at(row):
+    """
+    Returns the person_id in a row of the landmark tables.
+    """
+    if graph is not None:
+        return graph.person_ids[row]
+    return next(itertools.islice(people, row, None))
+
+
+def bidirectional_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, growing one breadth-first
+    frontier from each end and always expanding the smaller one.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # maps each reached person to the (movie_id, person_id) step
+    # leading back towards the side's starting person
+    forward = {source: None}
+    backward = {target: None}
+
+    # the current layer of each search
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # always expand the smaller layer
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = expand_layer(
+                forward_layer, forward, backward, stats
+            )
+        else:
+            backward_layer, meeting = expand_layer(
+                backward_layer, backward, forward, stats
+            )
+
+        if stats is not None:
+            stats.frontier_size(len(forward_layer) + len(backward_layer))
+
+        if meeting is not None:
+            return join_path(meeting, forward, backward)
+
+    # one side ran out of people, so the two are not connected
+    return None
+
+
+def expand_layer(layer, visited, other, stats=None):
+    """
+    Expands every person in `layer`, recording new people in `visited`.
+
+    Returns the next layer and the person where the two searches meet,
+    choosing the meeting that gives the shortest joined path, or None
+    if the searches have not met yet.
+    """
+    next_layer = []
+    meeting = None
+    best = None
+
+    for person_id in layer:
+        for movie_id, neighbor in expand(person_id, stats):
+            if neighbor in visited:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+            visited[neighbor] = (movie_id, person_id)
+            next_layer.append(neighbor)
+
+            # the searches met; keep the meeting nearest the other end
+            if neighbor in other:
+                length = steps_to_start(neighbor, other)
+                if best is None or length < best:
+                    best = length
+                    meeting = neighbor
+
+    return next_layer, meeting
+
+
+def steps_to_start(person_id, visited):
+    """
+    Returns how many steps `person_id` is from the start of the
+    search that recorded it in `visited`.
+    """
+    steps = 0
+    while visited[person_id] is not None:
+        person_id = visited[person_id][1]
+        steps += 1
+    return steps
+
+
+def join_path(meeting, forward, backward):
+    """
+    Joins the forward and backward halves of a bidirectional search
+    at `meeting` into a list of (movie_id, person_id) pairs.
+    """
+    # walk back from the meeting point to the source
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    # walk on from the meeting point to the target
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, child = backward[person_id]
+        path.append((movie_id, child))
+        person_id = child
+
+    return path
 
 
 def person_id_for_name(name):
@@ -159,9 +982,15 @@ def person_id_for_name(name):
     resolving ambiguities as needed.
     """
     person_ids = list(names.get(name.lower(), set()))
+
+    # offer the closest names when nobody has this exact one
+    misspelled = len(person_ids) == 0
+    if misspelled:
+        person_ids = candidates_for_name(name, limit=5)
+
     if len(person_ids) == 0:
         return None
-    elif len(person_ids) > 1:
+    elif len(person_ids) > 1 or misspelled:
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -179,11 +1008,56 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def get_name_index():
+    """
+    Returns the NameIndex over the loaded names, building it if needed.
+    """
+    global name_index
+
+    if name_index is None:
+        name_index = NameIndex(names)
+    return name_index
+
+
+def ids_for_names(matches, limit):
+    """
+    Returns up to `limit` person_ids for a ranked list of lowercase names.
+    """
+    person_ids = []
+    for name in matches:
+        person_ids.extend(sorted(names[name]))
+    return person_ids[:limit]
+
+
+def complete_name(prefix, limit=10):
+    """
+    Returns up to `limit` person_ids whose names start with `prefix`,
+    in name order.
+    """
+    return ids_for_names(get_name_index().complete(prefix, limit), limit)
+
+
+def candidates_for_name(name, limit=10):
+    """
+    Returns up to `limit` person_ids whose names best match `name`,
+    exact matches first and then the closest misspellings.
+    """
+    index = get_name_index()
+    matches = index.search(name, limit)
+    if name.lower() in names:
+        matches = [name.lower()] + [match for match in matches
+                                    if match != name.lower()]
+    return ids_for_names(matches, limit)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -0,0 +1,117 @@
+"""
+Landmark distance tables for A* search with the ALT heuristic
+(A*, landmarks and the triangle inequality).
+
+Each table holds the breadth-first distance from one landmark person to
+every person, one byte per person in people.csv order. By the triangle
+inequality, |d(L, a) - d(L, b)| never exceeds d(a, b), so the largest such
+difference over all landmarks is a lower bound on the distance from a to b.
+
+Saved tables are a file of MAGIC, the length of a JSON header as four
+little-endian bytes, the header itself (version, landmark person_ids,
+table size and the stamps of the CSV files the tables were built from)
+and then the raw bytes of each table in turn.
+"""
+
+import json
+import struct
+
+MAGIC = b"DGLM"
+
+# Bump whenever the saved layout changes
+VERSION = 2
+
+# Distance stored for people a landmark cannot reach
+UNREACHED = 255
+
+# Largest distance stored; longer distances are capped, which keeps
+# every bound a lower bound
+LONGEST = 254
+
+# Table translation that treats unreached people as distance 0
+REACHED_ONLY = bytes(range(UNREACHED)) + b"\x00"
+
+
+class Landmarks():
+    """
+    Distance tables from a list of landmark person_ids, with the stamps
+    of the source CSV files they were built from, or None if they were
+    built from data that no longer matches any files.
+    """
+
+    def __init__(self, landmarks, tables, sources=None):
+        self.landmarks = landmarks
+        self.tables = tables
+        self.sources = sources
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise Exception(f"{path} is not a landmark file")
+        start = len(MAGIC) + 4
+        (length,) = struct.unpack("<I", data[len(MAGIC):start])
+        header = json.loads(data[start:start + length].decode("utf-8"))
+        if header.get("version") != VERSION:
+            raise Exception(f"landmark file {path} has an unsupported version")
+
+        size = header["size"]
+        start += length
+        if len(data) - start != size * len(header["landmarks"]):
+            raise Exception(f"landmark file {path} is truncated")
+        tables = [data[start + n * size:start + (n + 1) * size]
+                  for n in range(len(header["landmarks"]))]
+        return cls(header["landmarks"], tables, header["sources"])
+
+    def save(self, path):
+        header = json.dumps({
+            "version": VERSION,
+            "landmarks": self.landmarks,
+            "size": self.size(),
+            "sources": self.sources
+        }).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header)
+            for table in self.tables:
+                f.write(table)
+
+    def size(self):
+        """Returns the number of people each table covers."""
+        return len(self.tables[0]) if self.tables else 0
+
+    def bound(self, first, second):
+        """
+        Returns a lower bound on the distance between the people in
+        rows `first` and `second`.
+        """
+        best = 0
+        for table in self.tables:
+            a, b = table[first], table[second]
+            if a != UNREACHED and b != UNREACHED:
+                difference = a - b if a > b else b - a
+                if difference > best:
+                    best = difference
+        return best
+
+
+def encode(distances, size):
+    """
+    Returns a table of `size` bytes from (row, distance) pairs.
+    """
+    table = bytearray([UNREACHED]) * size
+    for row, distance in distances:
+        table[row] = min(distance, LONGEST)
+    return bytes(table)
+
+
+def farthest(tables):
+    """
+    Returns the row whose nearest landmark is farthest away, among
+    the rows the landmarks reach.
+    """
+    nearest = tables[0]
+    for table in tables[1:]:
+        nearest = bytes(map(min, nearest, table))
+    nearest = nearest.translate(REACHED_ONLY)
+    return nearest.index(max(nearest))
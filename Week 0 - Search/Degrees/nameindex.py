@@ -0,0 +1,94 @@
+"""
+Prefix and fuzzy lookup of people's names.
+
+Prefix matches come from binary search over the sorted names. Fuzzy
+matches come from an inverted index of character trigrams, ranked by
+how many trigrams a name shares with the query (the Dice coefficient).
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+# Lowest trigram similarity for a fuzzy match to be returned
+MIN_SIMILARITY = 0.3
+
+
+def trigrams(name):
+    """
+    Returns the set of character trigrams of a padded, lowercase name.
+    """
+    padded = f"  {name.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex():
+    """
+    Index over a collection of lowercase names.
+    """
+
+    def __init__(self, names):
+        self.names = sorted(names)
+
+        # trigram -> rows of the names containing it, built on first use
+        self.postings = None
+        self.counts = None
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with `prefix`, in order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        row = bisect_left(self.names, prefix)
+        while (row < len(self.names) and len(matches) < limit
+               and self.names[row].startswith(prefix)):
+            matches.append(self.names[row])
+            row += 1
+        return matches
+
+    def search(self, query, limit=10):
+        """
+        Returns up to `limit` names most similar to `query`, best first.
+        """
+        return [name for score, name in self.ranked(query, limit)]
+
+    def ranked(self, query, limit=10):
+        """
+        Returns up to `limit` (similarity, name) pairs for the names most
+        similar to `query`, best first.
+        """
+        if self.postings is None:
+            self.build_postings()
+
+        # count the trigrams each name shares with the query
+        grams = trigrams(query)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+
+        scored = (
+            (2 * count / (len(grams) + self.counts[row]), row)
+            for row, count in shared.items()
+        )
+        return [(score, self.names[row])
+                for score, row in heapq.nlargest(limit, scored)
+                if score >= MIN_SIMILARITY]
+
+    def build_postings(self):
+        """
+        Builds the trigram inverted index over all names.
+        """
+        postings = {}
+        counts = array("H")
+        for row, name in enumerate(self.names):
+            grams = trigrams(name)
+            counts.append(min(len(grams), 0xFFFF))
+            for gram in grams:
+                rows = postings.get(gram)
+                if rows is None:
+                    rows = postings[gram] = array("i")
+                rows.append(row)
+        self.postings = postings
+        self.counts = counts
@@ -0,0 +1,202 @@
+"""
+Local HTTP/JSON server that keeps the Degrees graph resident.
+
+The graph is loaded once into a snapshot that a pool of worker processes
+memory-maps, and searches run on that pool so the asyncio event loop
+stays free to accept and answer other requests. Endpoints:
+
+    GET /path?source=...&target=...[&mode=...]
+    GET /names?q=...[&limit=...][&fuzzy=1]
+    GET /metrics
+
+The "astar" mode is only served when landmark tables are given with
+--landmarks.
+
+Usage: python server.py directory [--host HOST] [--port PORT] [--workers N]
+                        [--landmarks PATH] [--snapshot PATH]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+from batch import init_parent, init_worker, resolve
+from util import percentiles
+
+# Latencies kept per endpoint for the metrics
+LATENCY_WINDOW = 10000
+
+# Largest request head accepted, in bytes
+MAX_HEAD = 16 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def find_path(source, target, mode):
+    """
+    Returns the JSON-ready answer to a path query, in a worker process.
+    """
+    (source_id, source), (target_id, target) = resolve(source), resolve(target)
+    if source_id is None or target_id is None:
+        return 404, {"error": "Person not found.", "source": source, "target": target}
+
+    path, stats = degrees.shortest_path_with_stats(source_id, target_id, mode)
+    return 200, {
+        "source": source,
+        "target": target,
+        "degrees": None if path is None else len(path),
+        "path": path,
+        "stats": stats.as_dict()
+    }
+
+
+def find_names(query, limit, fuzzy):
+    """
+    Returns people whose names start with, or with `fuzzy` resemble,
+    the query, in a worker process.
+    """
+    if fuzzy:
+        person_ids = degrees.candidates_for_name(query, limit)
+    else:
+        person_ids = degrees.complete_name(query, limit)
+    people = []
+    for person_id in person_ids:
+        person = degrees.people[person_id]
+        people.append({"id": person_id, "name": person["name"],
+                       "birth": person["birth"]})
+    return 200, {"query": query, "people": people}
+
+
+class Server():
+    """
+    Routes requests to the worker pool and records their latencies.
+    """
+
+    def __init__(self, pool, astar=False):
+        self.pool = pool
+        self.astar = astar
+        self.started = time.time()
+        self.latencies = {}
+        self.counts = {}
+
+    async def handle(self, reader, writer):
+        start = time.perf_counter()
+        endpoint = None
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if len(head) > MAX_HEAD:
+                raise ValueError("request too large")
+            method, target, _ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+            url = urlsplit(target)
+            endpoint = url.path
+            if method != "GET":
+                status, body = 405, {"error": "Only GET is supported."}
+            else:
+                status, body = await self.route(url.path, parse_qs(url.query))
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            status, body = 400, {"error": "Malformed request."}
+        except Exception as error:
+            status, body = 500, {"error": str(error)}
+
+        payload = json.dumps(body).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + payload
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+        self.record(endpoint, status, time.perf_counter() - start)
+
+    async def route(self, path, query):
+        """
+        Returns the status and JSON body for a request path and query.
+        """
+        def field(name, default=None):
+            return query.get(name, [default])[0]
+
+        loop = asyncio.get_running_loop()
+        if path == "/path":
+            source, target = field("source"), field("target")
+            mode = field("mode", "bidirectional")
+            if source is None or target is None:
+                return 400, {"error": "source and target are required."}
+            if mode not in degrees.SEARCH_MODES:
+                return 400, {"error": f"mode must be one of {degrees.SEARCH_MODES}."}
+            if mode == "astar" and not self.astar:
+                return 400, {"error": "astar needs landmarks; start the server with --landmarks."}
+            return await loop.run_in_executor(
+                self.pool, find_path, source, target, mode)
+        elif path == "/names":
+            name = field("q")
+            if name is None:
+                return 400, {"error": "q is required."}
+            return await loop.run_in_executor(
+                self.pool, find_names, name, int(field("limit", 10)),
+                field("fuzzy", "0") == "1")
+        elif path == "/metrics":
+            return 200, self.metrics()
+        return 404, {"error": "Unknown endpoint."}
+
+    def record(self, endpoint, status, seconds):
+        key = endpoint if endpoint in ("/path", "/names", "/metrics") else "other"
+        counts = self.counts.setdefault(key, {})
+        counts[status] = counts.get(status, 0) + 1
+        self.latencies.setdefault(key, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def metrics(self):
+        return {
+            "uptime_seconds": time.time() - self.started,
+            "endpoints": {
+                endpoint: {
+                    "responses": {str(status): count for status, count
+                                  in self.counts.get(endpoint, {}).items()},
+                    "latency_seconds": percentiles(latencies)
+                }
+                for endpoint, latencies in self.latencies.items()
+            }
+        }
+
+
+async def serve(directory, host, port, workers, landmarks=None, snapshot=None):
+    # build the snapshot once up front so every worker just maps it,
+    # and check the landmarks match it before starting any workers
+    init_parent(directory, landmarks, snapshot)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(directory, landmarks, snapshot)) as pool:
+        server = Server(pool, astar=landmarks is not None)
+        listener = await asyncio.start_server(server.handle, host, port)
+        print(f"Serving on http://{host}:{port}")
+        async with listener:
+            await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Degrees queries over HTTP.")
+    parser.add_argument("directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--landmarks", help="landmark tables for the astar mode")
+    parser.add_argument("--snapshot", help="where to keep the snapshot of the graph")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.directory, args.host, args.port, args.workers,
+                          args.landmarks, args.snapshot))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Versioned binary snapshots of a CompactGraph.
+
+A snapshot is a directory of .npy files, memory-mapped when loaded, and
+a manifest recording the snapshot version along with the modified time
+and size of each CSV file the snapshot was built from, and of the log of
+persisted updates it includes.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from compact import CompactGraph
+from util import source_stamps
+
+# Bump whenever the set or layout of snapshot arrays changes
+VERSION = 2
+
+MANIFEST = "manifest.json"
+
+
+def default_path(directory):
+    """
+    Returns where the snapshot of a data directory is kept by default.
+    """
+    return os.path.join(directory, ".snapshot")
+
+
+def save(graph, directory, path=None):
+    """
+    Writes a snapshot of `graph`, built from the CSV files in `directory`
+    and every update logged there.
+    """
+    path = path or default_path(directory)
+    os.makedirs(path, exist_ok=True)
+
+    # drop the manifest first so a half-written snapshot is never loaded
+    manifest = os.path.join(path, MANIFEST)
+    if os.path.exists(manifest):
+        os.remove(manifest)
+
+    # replace each file rather than rewriting it in place, since other
+    # processes may still have the old arrays memory-mapped
+    arrays = graph.arrays()
+    for name, array in arrays.items():
+        filename = os.path.join(path, f"{name}.npy")
+        with open(f"{filename}.tmp", "wb") as f:
+            np.save(f, np.asarray(array))
+        os.replace(f"{filename}.tmp", filename)
+
+    with open(f"{manifest}.tmp", "w", encoding="utf-8") as f:
+        json.dump({
+            "version": VERSION,
+            "sources": source_stamps(directory),
+            "arrays": sorted(arrays)
+        }, f)
+    os.replace(f"{manifest}.tmp", manifest)
+
+
+def load(directory, path=None):
+    """
+    Returns the CompactGraph stored in the snapshot for `directory`,
+    or None if there is no snapshot or it is out of date.
+    """
+    path = path or default_path(directory)
+    try:
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (manifest.get("version") != VERSION
+            or manifest.get("sources") != source_stamps(directory)):
+        return None
+
+    arrays = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        for name in manifest["arrays"]
+    }
+    return CompactGraph.from_arrays(arrays)
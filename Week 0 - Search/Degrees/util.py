@@ -1,3 +1,15 @@
+import json
+import os
+from collections import OrderedDict, deque
+
+# CSV files the data is loaded from
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Log of rows added with add_data(persist=True), kept beside the CSV
+# files, one JSON object of people, movies and stars rows per line
+UPDATES = "updates.jsonl"
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +48,222 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class DequeStackFrontier():
+    """
+    Stack frontier backed by a deque, with a count of the states it
+    holds so that `contains_state` is a constant-time lookup.
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.pop()
+            self.discard(node.state)
+            return node
+
+    def discard(self, state):
+        count = self.states[state] - 1
+        if count == 0:
+            del self.states[state]
+        else:
+            self.states[state] = count
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            self.discard(node.state)
+            return node
+
+
+class TreeCache():
+    """
+    Least-recently-used cache of search trees keyed by their source,
+    holding at most `max_bytes` worth of trees.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.trees = OrderedDict()
+
+    def get(self, source):
+        if source not in self.trees:
+            return None
+        self.trees.move_to_end(source)
+        return self.trees[source][0]
+
+    def put(self, source, tree, size):
+        if source in self.trees:
+            self.used -= self.trees.pop(source)[1]
+
+        # a tree larger than the whole cache is not kept at all
+        if size > self.max_bytes:
+            return
+
+        # evict the least recently used trees until this one fits
+        while self.used + size > self.max_bytes:
+            _, (_, evicted) = self.trees.popitem(last=False)
+            self.used -= evicted
+
+        self.trees[source] = (tree, size)
+        self.used += size
+
+    def clear(self):
+        self.trees.clear()
+        self.used = 0
+
+
+class UnionFind():
+    """
+    Disjoint sets of states, merged by size with path halving.
+    `sizes` maps the root of each set to the number of states in it.
+    """
+
+    def __init__(self):
+        self.parent = {}
+        self.sizes = {}
+
+    def add(self, state):
+        if state not in self.parent:
+            self.parent[state] = state
+            self.sizes[state] = 1
+
+    def find(self, state):
+        parent = self.parent
+        while parent[state] != state:
+            parent[state] = parent[parent[state]]
+            state = parent[state]
+        return state
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return
+
+        # hang the smaller set under the larger one
+        if self.sizes[first] < self.sizes[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.sizes[first] += self.sizes.pop(second)
+
+    def size(self, state):
+        return self.sizes[self.find(state)]
+
+    def clear(self):
+        self.parent.clear()
+        self.sizes.clear()
+
+
+class SearchStats():
+    """
+    Counters and timings of one search:
+        - `expanded`: people whose neighbors were generated
+        - `generated`: (movie_id, person_id) neighbors generated
+        - `duplicates`: generated neighbors rejected as already reached
+        - `peak_frontier`: largest number of people waiting to be expanded
+        - `neighbor_seconds`: time spent generating neighbors
+        - `frontier_seconds`: the rest of the search time, spent on the
+          frontier and other bookkeeping
+    """
+
+    def __init__(self, mode=None):
+        self.mode = mode
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.peak_frontier = 0
+        self.neighbor_seconds = 0.0
+        self.frontier_seconds = 0.0
+        self.total_seconds = 0.0
+        self.length = None
+
+    def frontier_size(self, size):
+        if size > self.peak_frontier:
+            self.peak_frontier = size
+
+    def finish(self, seconds, path):
+        self.total_seconds = seconds
+        self.frontier_seconds = max(0.0, seconds - self.neighbor_seconds)
+        self.length = None if path is None else len(path)
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def percentiles(values):
+    """
+    Returns the 50th, 90th and 99th percentiles and maximum of `values`.
+    """
+    values = sorted(values)
+    if not values:
+        return {}
+
+    def at(fraction):
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+    return {"p50": at(0.50), "p90": at(0.90), "p99": at(0.99), "max": values[-1]}
+
+
+def source_stamps(directory):
+    """
+    Returns the [modified time, size] of each source CSV file, and of
+    the log of persisted updates if there is one.
+    """
+    stamps = {}
+    for name in SOURCES + (UPDATES,):
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except FileNotFoundError:
+            if name == UPDATES:
+                continue
+            raise
+        stamps[name] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+
+def read_updates(directory):
+    """
+    Returns the (people, movies, stars) rows of each update persisted
+    to `directory`, oldest first.
+    """
+    try:
+        with open(os.path.join(directory, UPDATES), encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+    updates = []
+    for line in lines:
+        update = json.loads(line)
+        updates.append((update["people"], update["movies"], update["stars"]))
+    return updates
+
+
+def append_update(directory, people, movies, stars):
+    """
+    Appends one update of people, movies and stars rows to the log
+    in `directory`.
+    """
+    line = json.dumps({"people": people, "movies": movies, "stars": stars})
+    with open(os.path.join(directory, UPDATES), "a", encoding="utf-8") as f:
+        f.write(line + "\n")
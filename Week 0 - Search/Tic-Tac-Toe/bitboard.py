@@ -0,0 +1,136 @@
+"""
+Bitboards for Tic Tac Toe.
+
+A position is two integers, the cells held by X and the cells held by O,
+with cell (i, j) at bit 3 * i + j. A move is a single OR, and wins are
+read from a table precomputed for every possible set of cells.
+
+Positions that are rotations or reflections of each other share one
+canonical key, so caches hold each of them once.
+"""
+
+SIZE = 3
+CELLS = SIZE * SIZE
+FULL = (1 << CELLS) - 1
+
+# Masks of the eight winning lines: rows, columns and diagonals
+LINES = tuple(
+    [sum(1 << (SIZE * i + j) for j in range(SIZE)) for i in range(SIZE)]
+    + [sum(1 << (SIZE * i + j) for i in range(SIZE)) for j in range(SIZE)]
+    + [sum(1 << (SIZE * i + i) for i in range(SIZE)),
+       sum(1 << (SIZE * i + SIZE - 1 - i) for i in range(SIZE))]
+)
+
+# WINNING[mask] is True if the cells in `mask` complete a line
+WINNING = tuple(
+    any(mask & line == line for line in LINES) for mask in range(1 << CELLS)
+)
+
+# COUNTS[mask] is the number of cells in `mask`
+COUNTS = tuple(bin(mask).count("1") for mask in range(1 << CELLS))
+
+# Cells in the order moves are tried: centre, corners, then edges,
+# which finds strong moves early and prunes more
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+
+
+def symmetries(size=SIZE):
+    """
+    Returns the eight rotations and reflections of a size x size board,
+    each as a tuple giving the cell that every cell is carried to.
+    """
+    result = []
+    for reflect in (False, True):
+        for turns in range(4):
+            cells = []
+            for cell in range(size * size):
+                i, j = divmod(cell, size)
+                if reflect:
+                    j = size - 1 - j
+                for _ in range(turns):
+                    i, j = j, size - 1 - i
+                cells.append(size * i + j)
+            result.append(tuple(cells))
+    return tuple(result)
+
+
+SYMMETRIES = symmetries()
+
+# INVERSES[s] undoes SYMMETRIES[s]
+INVERSES = tuple(
+    tuple(cells.index(cell) for cell in range(CELLS)) for cells in SYMMETRIES
+)
+
+# TRANSFORMED[s][mask] is `mask` carried by SYMMETRIES[s]
+TRANSFORMED = tuple(
+    tuple(sum(1 << cells[cell] for cell in range(CELLS) if mask >> cell & 1)
+          for mask in range(1 << CELLS))
+    for cells in SYMMETRIES
+)
+
+# Kinds of table entry, as in engine's TranspositionTable
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+def x_to_move(x, o):
+    """
+    Returns True if X moves next.
+    """
+    return COUNTS[x] == COUNTS[o]
+
+
+def play(x, o, cell):
+    """
+    Returns the position after the player to move takes `cell`.
+    """
+    if x_to_move(x, o):
+        return x | (1 << cell), o
+    return x, o | (1 << cell)
+
+
+def moves(x, o):
+    """
+    Returns the empty cells, in MOVE_ORDER.
+    """
+    taken = x | o
+    return [cell for cell in MOVE_ORDER if not taken >> cell & 1]
+
+
+def score(x, o):
+    """
+    Returns 1 if X has won, -1 if O has won, 0 for a draw
+    and None if the game is not over.
+    """
+    if WINNING[x]:
+        return 1
+    elif WINNING[o]:
+        return -1
+    elif x | o == FULL:
+        return 0
+    return None
+
+
+def canonical(x, o):
+    """
+    Returns (x, o, symmetry): the least of the eight images of the
+    position, and the index of the symmetry that carries it there.
+    """
+    return min((masks[x], masks[o], symmetry)
+               for symmetry, masks in enumerate(TRANSFORMED))
+
+
+def to_canonical(cell, symmetry):
+    """
+    Returns where `symmetry` carries `cell`, or None for None.
+    """
+    return None if cell is None else SYMMETRIES[symmetry][cell]
+
+
+def from_canonical(cell, symmetry):
+    """
+    Returns the cell that `symmetry` carries to `cell`, or None for None.
+    """
+    return None if cell is None else INVERSES[symmetry][cell]
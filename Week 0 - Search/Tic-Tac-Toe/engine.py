@@ -0,0 +1,337 @@
+"""
+Search engine for N x N boards where k marks in a row win.
+
+Boards are bitboards as in bitboard.py, with cell (i, j) at bit
+size * i + j, for any size. The search is negamax with alpha-beta
+pruning and a transposition table keyed by the canonical form of each
+position under rotation and reflection, deepened one ply at a time until the
+position is solved or the time budget for the move runs out, when the
+best move of the deepest finished search is played. Positions at the
+depth limit are scored by a heuristic count of the lines still open.
+"""
+
+import time
+from collections import OrderedDict
+
+from bitboard import EXACT, LOWER, UPPER, symmetries
+
+# Value of a won position; heuristic scores always stay below it
+WIN = 1000000
+
+# Default seconds to spend on a move
+MOVE_SECONDS = 1.0
+
+# Nodes searched between looks at the clock
+CLOCK_INTERVAL = 256
+
+# Most positions the transposition table keeps
+TABLE_SIZE = 1000000
+
+# Only cells within this many steps of a mark are tried as moves
+NEAR = 2
+
+
+class Timeout(Exception):
+    """
+    Raised inside a search when its time budget runs out.
+    """
+
+
+def count(mask):
+    """
+    Returns the number of cells in `mask`.
+    """
+    return bin(mask).count("1")
+
+
+def transform(mask, cells):
+    """
+    Returns `mask` with each cell carried to cells[cell].
+    """
+    image = 0
+    while mask:
+        low = mask & -mask
+        image |= 1 << cells[low.bit_length() - 1]
+        mask ^= low
+    return image
+
+
+class TranspositionTable():
+    """
+    Searched positions by key, each with the depth searched to, the
+    value, whether it is exact or only a bound, and the best move.
+    Holds at most `size` entries, evicting the least recently used.
+    """
+
+    def __init__(self, size=TABLE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Returns the stored (depth, value, flag, move), or None.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def lookup(self, key, depth, alpha, beta):
+        """
+        Returns the stored (value, move) if it settles a search of `depth`
+        plies within the window (alpha, beta); otherwise None.
+        """
+        entry = self.get(key)
+        if entry is None or not settles(entry, depth, alpha, beta):
+            return None
+        return entry[1], entry[3]
+
+    def store(self, key, depth, value, flag, move):
+        self.entries[key] = (depth, value, flag, move)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+def settles(entry, depth, alpha, beta):
+    """
+    Returns True if a table entry searched at least `depth` plies is
+    exact, or a bound that falls outside the window (alpha, beta).
+    """
+    stored_depth, value, flag, _ = entry
+    return stored_depth >= depth and (
+        flag == EXACT
+        or (flag == LOWER and value >= beta)
+        or (flag == UPPER and value <= alpha))
+
+
+class Geometry():
+    """
+    Winning lines, neighbourhoods and move order of a size x size board
+    where k marks in a row win.
+    """
+
+    def __init__(self, size=3, k=3):
+        if not 1 <= k <= size:
+            raise Exception("k must be between 1 and the board size")
+        self.size = size
+        self.k = k
+        self.cells = size * size
+        self.full = (1 << self.cells) - 1
+
+        # every run of k cells across, down and along both diagonals
+        lines = []
+        for i in range(size):
+            for j in range(size):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    if (0 <= i + di * (k - 1) < size
+                            and 0 <= j + dj * (k - 1) < size):
+                        lines.append(sum(1 << self.cell(i + di * n, j + dj * n)
+                                         for n in range(k)))
+        self.lines = tuple(dict.fromkeys(lines))
+        self.lines_through = tuple(
+            tuple(line for line in self.lines if line >> cell & 1)
+            for cell in range(self.cells)
+        )
+
+        # cells within NEAR steps of each cell
+        self.near = tuple(
+            sum(1 << self.cell(a, b)
+                for a in range(max(0, i - NEAR), min(size, i + NEAR + 1))
+                for b in range(max(0, j - NEAR), min(size, j + NEAR + 1)))
+            for i, j in map(self.position, range(self.cells))
+        )
+
+        # rotations and reflections, and the symmetries that undo them
+        self.symmetries = symmetries(size)
+        self.inverses = tuple(
+            tuple(cells.index(cell) for cell in range(self.cells))
+            for cells in self.symmetries
+        )
+
+        # cells nearest the centre are tried first
+        centre = (size - 1) / 2
+        self.order = tuple(sorted(
+            range(self.cells),
+            key=lambda cell: max(abs(n - centre) for n in self.position(cell))
+        ))
+
+        # score of an open line holding n marks of one player
+        self.weights = tuple(4 ** n if n else 0 for n in range(k + 1))
+
+    def cell(self, i, j):
+        return self.size * i + j
+
+    def position(self, cell):
+        return divmod(cell, self.size)
+
+    def wins(self, mask, cell):
+        """
+        Returns True if the marks in `mask` complete a line through `cell`.
+        """
+        return any(mask & line == line for line in self.lines_through[cell])
+
+    def won(self, mask):
+        """
+        Returns True if the marks in `mask` complete any line.
+        """
+        return any(mask & line == line for line in self.lines)
+
+    def canonical(self, me, them):
+        """
+        Returns (me, them, symmetry): the least of the eight images of
+        the position, and the index of the symmetry that carries it there.
+        """
+        return min((transform(me, cells), transform(them, cells), symmetry)
+                   for symmetry, cells in enumerate(self.symmetries))
+
+    def candidates(self, me, them):
+        """
+        Returns the empty cells near a mark, in move order, or every empty
+        cell if none is near. On an empty board only the centre is returned.
+        """
+        taken = me | them
+        if not taken:
+            return [self.order[0]]
+        near = 0
+        marks = taken
+        while marks:
+            low = marks & -marks
+            near |= self.near[low.bit_length() - 1]
+            marks ^= low
+        free = near & ~taken or self.full & ~taken
+        return [cell for cell in self.order if free >> cell & 1]
+
+    def evaluate(self, me, them):
+        """
+        Returns a heuristic score of the position for the holder of `me`:
+        the weights of the lines only they can still complete, less those
+        only their opponent can.
+        """
+        score = 0
+        for line in self.lines:
+            mine, theirs = line & me, line & them
+            if not theirs:
+                score += self.weights[count(mine)]
+            elif not mine:
+                score -= self.weights[count(theirs)]
+        return max(-WIN + 1, min(WIN - 1, score))
+
+
+class Engine():
+    """
+    Iterative deepening alpha-beta search over a Geometry.
+    """
+
+    def __init__(self, geometry, seconds=MOVE_SECONDS, table_size=TABLE_SIZE):
+        self.geometry = geometry
+        self.seconds = seconds
+        self.table = TranspositionTable(table_size)
+
+        # statistics of the last call to best_move
+        self.nodes = 0
+        self.depth = 0
+        self.value = None
+
+        self.deadline = None
+        self.cancel = None
+
+    def best_move(self, x, o, seconds=None, depth=None, cancel=None):
+        """
+        Returns the best cell for the player to move found within
+        `seconds`, searching at most `depth` plies if given, or None
+        if the game is over. Setting the threading.Event `cancel`, if
+        given, ends the search early as if its time had run out.
+        """
+        geometry = self.geometry
+        if geometry.won(x) or geometry.won(o) or x | o == geometry.full:
+            return None
+        me, them = (x, o) if count(x) == count(o) else (o, x)
+
+        seconds = self.seconds if seconds is None else seconds
+        self.deadline = time.perf_counter() + seconds
+        self.cancel = cancel
+        self.nodes = 0
+        self.depth = 0
+        self.value = None
+
+        # deepen until the game is solved or the time runs out
+        best = geometry.candidates(me, them)[0]
+        limit = geometry.cells - count(x | o)
+        if depth is not None:
+            limit = min(limit, depth)
+        for depth in range(1, limit + 1):
+            if cancel is not None and cancel.is_set():
+                break
+            try:
+                value, move = self.negamax(me, them, depth, -WIN, WIN)
+            except Timeout:
+                break
+            best, self.value, self.depth = move, value, depth
+            if abs(value) == WIN:
+                break
+        return best
+
+    def negamax(self, me, them, depth, alpha, beta):
+        """
+        Returns (value, cell) for the player to move, who holds `me`,
+        searching `depth` plies within the window (alpha, beta).
+        """
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and (
+                time.perf_counter() > self.deadline
+                or self.cancel is not None and self.cancel.is_set()):
+            raise Timeout
+
+        geometry = self.geometry
+        key_me, key_them, symmetry = geometry.canonical(me, them)
+        key = (key_me, key_them)
+        hint = None
+        entry = self.table.get(key)
+        if entry is not None:
+            hint = geometry.inverses[symmetry][entry[3]]
+            if settles(entry, depth, alpha, beta):
+                return entry[1], hint
+
+        moves = geometry.candidates(me, them)
+        if not moves:
+            return 0, None
+
+        # take a win at once rather than a slower one found deeper
+        for cell in moves:
+            if geometry.wins(me | (1 << cell), cell):
+                return WIN, cell
+
+        if depth == 0:
+            return geometry.evaluate(me, them), None
+
+        # try the best move of an earlier search first
+        if hint in moves:
+            moves.remove(hint)
+            moves.insert(0, hint)
+
+        low = alpha
+        value = -WIN
+        best = moves[0]
+        for cell in moves:
+            child = -self.negamax(them, me | (1 << cell), depth - 1, -beta, -alpha)[0]
+            if child > value:
+                value, best = child, cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if value >= beta:
+            flag = LOWER
+        elif value <= low:
+            flag = UPPER
+        else:
+            flag = EXACT
+        self.table.store(key, depth, value, flag, geometry.symmetries[symmetry][best])
+        return value, best
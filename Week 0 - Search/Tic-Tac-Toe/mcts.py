@@ -0,0 +1,231 @@
+"""
+Monte Carlo tree search for Tic Tac Toe and its larger variants.
+
+Each playout descends the tree by UCT (upper confidence bounds applied
+to trees), adds the children of the leaf it reaches, and finishes the
+game with random moves; the result is then counted in every node on the
+way down. The move played is the root child visited most.
+
+The tree is kept in parallel arrays, one slot per node, with the
+children of a node in consecutive slots, so a node costs a few machine
+words rather than a Python object. Positions are not stored: they are
+replayed from the root as the tree is descended.
+"""
+
+import math
+import multiprocessing
+import random
+import time
+from array import array
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+
+from engine import Geometry, count
+from tictactoe import to_bitboard
+
+# Exploration constant of UCT
+EXPLORATION = math.sqrt(2)
+
+# Playouts per move when neither a count nor a time budget is given
+PLAYOUTS = 10000
+
+# Playouts between looks at the cancel event
+CANCEL_INTERVAL = 16
+
+# Seconds between looks at the cancel event while workers search
+POLL_SECONDS = 0.05
+
+# Geometries built so far in this process, by (size, k)
+geometries = {}
+
+
+def geometry_for(size, k):
+    if (size, k) not in geometries:
+        geometries[size, k] = Geometry(size, k)
+    return geometries[size, k]
+
+
+class Tree():
+    """
+    Search tree in parallel arrays. Node 0 is the root; a node's wins
+    are counted for the player who moved into it, a draw as half a win.
+    """
+
+    def __init__(self):
+        self.moves = array("i", [-1])
+        self.first = array("i", [-1])   # first child, or -1 until expanded
+        self.counts = array("i", [0])   # number of children
+        self.visits = array("i", [0])
+        self.wins = array("d", [0.0])
+
+    def __len__(self):
+        return len(self.moves)
+
+    def expand(self, node, moves):
+        self.first[node] = len(self.moves)
+        self.counts[node] = len(moves)
+        for move in moves:
+            self.moves.append(move)
+            self.first.append(-1)
+            self.counts.append(0)
+            self.visits.append(0)
+            self.wins.append(0.0)
+
+    def select(self, node):
+        """
+        Returns the child of `node` with the highest UCT score, trying
+        every child once first.
+        """
+        first = self.first[node]
+        log_visits = math.log(max(1, self.visits[node]))
+        best, best_score = first, -1.0
+        for child in range(first, first + self.counts[node]):
+            visits = self.visits[child]
+            if visits == 0:
+                return child
+            score = (self.wins[child] / visits
+                     + EXPLORATION * math.sqrt(log_visits / visits))
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+
+def playout(geometry, masks, side, rng):
+    """
+    Plays random moves from a position until the game ends. Returns the
+    index into `masks` of the winner, or None for a draw.
+    """
+    taken = masks[0] | masks[1]
+    free = [cell for cell in range(geometry.cells) if not taken >> cell & 1]
+    rng.shuffle(free)
+    for cell in free:
+        masks[side] |= 1 << cell
+        if geometry.wins(masks[side], cell):
+            return side
+        side ^= 1
+    return None
+
+
+def search(size, k, me, them, playouts=None, seconds=None, seed=None,
+           cancel=None):
+    """
+    Runs UCT from the position where the player to move holds `me`, for
+    `playouts` playouts or `seconds`, whichever ends first, or until the
+    event `cancel` is set. Returns the visits of each move from the
+    root, as a dict from cell to visits.
+    """
+    geometry = geometry_for(size, k)
+    rng = random.Random(seed)
+    tree = Tree()
+    deadline = None if seconds is None else time.perf_counter() + seconds
+
+    done = 0
+    while ((playouts is None or done < playouts)
+           and (deadline is None or time.perf_counter() < deadline)):
+        if cancel is not None and done % CANCEL_INTERVAL == 0 and cancel.is_set():
+            break
+        masks = [me, them]
+        side = 0
+        node = 0
+        path = [0]
+        winner = None
+        over = False
+
+        # descend the tree, then add the children of the leaf reached
+        while True:
+            if tree.first[node] == -1:
+                moves = geometry.candidates(masks[side], masks[side ^ 1])
+                if not moves:
+                    over = True
+                    break
+                tree.expand(node, moves)
+            node = tree.select(node)
+            path.append(node)
+            cell = tree.moves[node]
+            masks[side] |= 1 << cell
+            if geometry.wins(masks[side], cell):
+                winner, over = side, True
+                break
+            side ^= 1
+            if tree.visits[node] == 0:
+                break
+
+        if not over:
+            winner = playout(geometry, masks, side, rng)
+
+        # the player who moved into a node at depth d is side (d + 1) % 2
+        for depth, node in enumerate(path):
+            tree.visits[node] += 1
+            if winner is None:
+                tree.wins[node] += 0.5
+            elif winner == (depth + 1) % 2:
+                tree.wins[node] += 1.0
+        done += 1
+
+    first = tree.first[0]
+    return {tree.moves[child]: tree.visits[child]
+            for child in range(first, first + tree.counts[0])
+            if tree.visits[child]}
+
+
+def mcts(board, k=None, playouts=None, seconds=None, workers=1, cancel=None):
+    """
+    Returns the move (i, j) for the player to move on a square board of
+    any size where k in a row wins, as many as the board is wide unless
+    given, or None if the game is over. Runs `playouts` playouts,
+    PLAYOUTS if neither they nor `seconds` is given, stopping early once
+    the threading.Event `cancel` is set. With several workers, each
+    searches its own tree in its own process and their root visits are
+    added up.
+    """
+    size = len(board)
+    k = size if k is None else k
+    geometry = geometry_for(size, k)
+    x, o = to_bitboard(board)
+    if geometry.won(x) or geometry.won(o) or x | o == geometry.full:
+        return None
+    me, them = (x, o) if count(x) == count(o) else (o, x)
+
+    # a forced move needs no search
+    moves = geometry.candidates(me, them)
+    if len(moves) == 1:
+        return geometry.position(moves[0])
+
+    if playouts is None and seconds is None:
+        playouts = PLAYOUTS
+    if workers == 1:
+        visits = search(size, k, me, them, playouts, seconds, cancel=cancel)
+    else:
+        visits = parallel_search(size, k, me, them, playouts, seconds,
+                                 workers, cancel)
+
+    # a search cancelled before its first playout plays the first candidate
+    if not visits:
+        return geometry.position(moves[0])
+    return geometry.position(max(visits, key=visits.get))
+
+
+def parallel_search(size, k, me, them, playouts, seconds, workers, cancel=None):
+    """
+    Runs `search` in `workers` processes, sharing out the playouts, and
+    returns their root visits added up. If `cancel` is given, it is
+    passed on to the workers through a manager process.
+    """
+    share = None if playouts is None else math.ceil(playouts / workers)
+    with multiprocessing.Manager() as manager, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        stop = None if cancel is None else manager.Event()
+        futures = [pool.submit(search, size, k, me, them, share, seconds, seed, stop)
+                   for seed in range(workers)]
+
+        # pass a cancel on while waiting for the workers
+        pending = futures
+        while pending:
+            _, pending = wait(pending, POLL_SECONDS, FIRST_EXCEPTION)
+            if cancel is not None and cancel.is_set():
+                stop.set()
+
+        visits = {}
+        for future in futures:
+            for cell, n in future.result().items():
+                visits[cell] = visits.get(cell, 0) + n
+    return visits
@@ -0,0 +1,124 @@
+"""
+Perfect-play table for 3 x 3 Tic Tac Toe.
+
+Every position reachable from the empty board is solved once and saved
+as one byte per position, indexed by the board read as a base-3 number
+with cell (i, j) as digit 3 * i + j (0 empty, 1 X, 2 O). Only canonical
+positions are solved, the least image of each under rotation and
+reflection, and the others are looked up through them. The high bits
+of each byte hold the minimax value plus one, and the low four bits the
+best cell of the canonical position, or NO_MOVE when the game is over.
+Every other position holds UNREACHED.
+
+Usage: python perfect.py [path]
+"""
+
+import os
+import sys
+
+import bitboard
+
+MAGIC = b"TTTP"
+
+# Bump whenever the table layout changes
+VERSION = 2
+
+# Default location of the table, next to this file
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfect.bin")
+
+POSITIONS = 3 ** bitboard.CELLS
+NO_MOVE = 0x0F
+UNREACHED = 0xFF
+
+# DIGITS[mask] is the base-3 number with a 1 at every cell in `mask`
+DIGITS = tuple(
+    sum(3 ** cell for cell in range(bitboard.CELLS) if mask >> cell & 1)
+    for mask in range(1 << bitboard.CELLS)
+)
+
+
+def index(x, o):
+    """
+    Returns the table index of the position (x, o).
+    """
+    return DIGITS[x] + 2 * DIGITS[o]
+
+
+def solve():
+    """
+    Returns the table of every canonical position reachable from the
+    empty board.
+    """
+    table = bytearray([UNREACHED]) * POSITIONS
+
+    def value(x, o):
+        x, o, _ = bitboard.canonical(x, o)
+        entry = table[index(x, o)]
+        if entry != UNREACHED:
+            return (entry >> 4) - 1
+
+        score = bitboard.score(x, o)
+        move = NO_MOVE
+        if score is None:
+            x_moves = bitboard.x_to_move(x, o)
+            for cell in bitboard.moves(x, o):
+                child = value(*bitboard.play(x, o, cell))
+                if score is None or (child > score if x_moves else child < score):
+                    score, move = child, cell
+
+        table[index(x, o)] = (score + 1) << 4 | move
+        return score
+
+    value(0, 0)
+    return bytes(table)
+
+
+def save(table, path=TABLE_PATH):
+    with open(path, "wb") as f:
+        f.write(MAGIC + bytes([VERSION]) + table)
+
+
+def load(path=TABLE_PATH):
+    """
+    Returns the saved table, or None if it is missing or was written
+    by a different version.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if not data.startswith(MAGIC):
+        raise Exception(f"{path} is not a perfect-play table")
+    if data[len(MAGIC)] != VERSION or len(data) != len(MAGIC) + 1 + POSITIONS:
+        return None
+    return data[len(MAGIC) + 1:]
+
+
+def lookup(table, x, o):
+    """
+    Returns (value, cell) for the position (x, o), with cell None when
+    the game is over, or None if the position is unreachable.
+    """
+    x, o, symmetry = bitboard.canonical(x, o)
+    entry = table[index(x, o)]
+    if entry == UNREACHED:
+        return None
+    move = entry & NO_MOVE
+    if move == NO_MOVE:
+        return (entry >> 4) - 1, None
+    return (entry >> 4) - 1, bitboard.from_canonical(move, symmetry)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python perfect.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else TABLE_PATH
+    table = solve()
+    save(table, path)
+    reached = sum(entry != UNREACHED for entry in table)
+    print(f"Solved {reached} canonical positions into {path}")
+
+
+if __name__ == "__main__":
+    main()
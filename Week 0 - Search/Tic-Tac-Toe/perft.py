@@ -0,0 +1,168 @@
+"""
+Node counts and profiling for the tictactoe search.
+
+Enumerates the game tree from the empty board to a given depth, perft
+style, counting the nodes at each ply and the finished games by outcome.
+With --search it also runs MAX_VALUE or MIN_VALUE from the empty board
+and counts the positions they visit, and runs the engine's best_move,
+which minimax plays larger boards with, from the same board to full
+depth, reporting its nodes, depth and time. Calls to, and time spent in,
+actions, result, winner, terminal and player are recorded throughout;
+times include nested calls, so terminal's time includes its winner
+calls. Results are printed as JSON.
+
+Usage: python perft.py [--depth N] [--search] [--output FILE]
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+
+import tictactoe as ttt
+from engine import Engine, Geometry
+
+PRIMITIVES = ("actions", "result", "winner", "terminal", "player")
+SEARCHES = ("MAX_VALUE", "MIN_VALUE")
+
+
+class Profile():
+    """
+    Counts calls to, and time spent in, functions of the tictactoe module
+    while active, by swapping timed wrappers into the module.
+    """
+
+    def __init__(self, names):
+        self.calls = dict.fromkeys(names, 0)
+        self.seconds = dict.fromkeys(names, 0.0)
+        self.originals = {}
+
+    def wrap(self, name, function):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.seconds[name] += time.perf_counter() - start
+                self.calls[name] += 1
+        return timed
+
+    def __enter__(self):
+        for name in self.calls:
+            self.originals[name] = getattr(ttt, name)
+            setattr(ttt, name, self.wrap(name, self.originals[name]))
+        return self
+
+    def __exit__(self, *exc):
+        for name, function in self.originals.items():
+            setattr(ttt, name, function)
+        self.originals = {}
+
+    def as_dict(self):
+        return {
+            name: {
+                "calls": self.calls[name],
+                "seconds": self.seconds[name],
+                "ns_per_call": (1e9 * self.seconds[name] / self.calls[name]
+                                if self.calls[name] else None)
+            }
+            for name in self.calls
+        }
+
+
+def perft(board, depth, nodes, outcomes, ply=0):
+    """
+    Counts the nodes below `board` into nodes[ply], down to `depth`
+    plies, and the games that end within it into `outcomes`.
+    """
+    nodes[ply] += 1
+    if ttt.terminal(board):
+        outcomes[ttt.winner(board) or "draw"] += 1
+        return
+    if ply == depth:
+        return
+    for action in ttt.actions(board):
+        perft(ttt.result(board, action), depth, nodes, outcomes, ply + 1)
+
+
+def run_perft(depth):
+    nodes = [0] * (depth + 1)
+    outcomes = {ttt.X: 0, ttt.O: 0, "draw": 0}
+    with Profile(PRIMITIVES) as profile:
+        start = time.perf_counter()
+        perft(ttt.initial_state(), depth, nodes, outcomes)
+        seconds = time.perf_counter() - start
+    return {
+        "depth": depth,
+        "nodes": sum(nodes),
+        "nodes_per_ply": nodes,
+        "outcomes": outcomes,
+        "seconds": seconds,
+        "nodes_per_second": sum(nodes) / seconds,
+        "primitives": profile.as_dict()
+    }
+
+
+def run_search():
+    ttt.table.clear()
+    board = ttt.initial_state()
+    with Profile(PRIMITIVES) as profile, Profile(SEARCHES) as searches:
+        start = time.perf_counter()
+        value, move = (ttt.MAX_VALUE if ttt.player(board) == ttt.X else ttt.MIN_VALUE)(board)
+        seconds = time.perf_counter() - start
+    nodes = sum(searches.calls.values())
+    return {
+        "value": value,
+        "move": move,
+        "nodes": nodes,
+        "calls": searches.calls,
+        "table_entries": len(ttt.table),
+        "seconds": seconds,
+        "nodes_per_second": nodes / seconds,
+        "primitives": profile.as_dict()
+    }
+
+
+def run_engine():
+    board = ttt.initial_state()
+    engine = Engine(Geometry(len(board)), seconds=math.inf)
+    start = time.perf_counter()
+    cell = engine.best_move(*ttt.to_bitboard(board))
+    seconds = time.perf_counter() - start
+    return {
+        "value": engine.value,
+        "move": divmod(cell, len(board)),
+        "nodes": engine.nodes,
+        "depth": engine.depth,
+        "table_entries": len(engine.table),
+        "seconds": seconds,
+        "nodes_per_second": engine.nodes / seconds
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count and profile tictactoe search nodes.")
+    parser.add_argument("--depth", type=int, default=9,
+                        help="plies to enumerate from the empty board")
+    parser.add_argument("--search", action="store_true",
+                        help="also profile MAX_VALUE/MIN_VALUE and the engine "
+                             "from the empty board")
+    parser.add_argument("--output", help="file for the JSON results, stdout if omitted")
+    args = parser.parse_args()
+
+    results = {"python": sys.version.split()[0], "perft": run_perft(args.depth)}
+    if args.search:
+        results["search"] = run_search()
+        results["engine"] = run_engine()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,26 @@
 import pygame
+import random
 import sys
 import time
 
 import tictactoe as ttt
+from worker import Worker
 
 pygame.init()
 size = width, height = 600, 400
 
+# Frames drawn per second
+fps = 60
+
+# Shortest time the computer appears to think, in seconds
+thinking_time = 0.5
+
 # Colors
 black = (0, 0, 0)
 white = (255, 255, 255)
 
 screen = pygame.display.set_mode(size)
+clock = pygame.time.Clock()
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
@@ -19,12 +28,16 @@ moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# The computer searches on a worker; thinking_since is when it started
+worker = Worker(ttt.minimax)
+thinking_since = None
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            worker.cancel()
             sys.exit()
 
     screen.fill(black)
@@ -108,15 +121,19 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, which the worker searches for in the background
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            if thinking_since is None:
+                worker.start(board)
+                thinking_since = time.perf_counter()
+            elif worker.done and time.perf_counter() - thinking_since >= thinking_time:
+                move = worker.move
+                # play on with a random move if the search failed
+                if worker.error is not None:
+                    print(f"Search failed: {worker.error!r}", file=sys.stderr)
+                    move = random.choice(sorted(ttt.actions(board)))
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+                thinking_since = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -139,8 +156,10 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    worker.cancel()
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    thinking_since = None
 
     pygame.display.flip()
+    clock.tick(fps)
@@ -4,10 +4,21 @@ Tic Tac Toe Player
 
 import math, copy
 
+import bitboard
+import perfect
+from bitboard import EXACT, LOWER, UPPER
+from engine import Engine, Geometry, TranspositionTable
+
 X = "X"
 O = "O"
 EMPTY = None
 
+# Most positions the transposition table of MAX_VALUE and MIN_VALUE keeps
+TABLE_SIZE = 100000
+
+# Depth stored for their entries, which are always searched to the end
+FULL_DEPTH = bitboard.CELLS
+
 
 def initial_state():
     """
@@ -128,78 +139,234 @@ def utility(board):
             return 0 
 
 
-def minimax(board):
+def minimax(board, k=None, cancel=None):
     """
     Returns the optimal action for the current player on the board.
-    """
 
-    # return None if game is over
-    if terminal(board):
-        return None
+    Square boards of any size are accepted, where `k` marks in a row
+    win, as many as the board is wide unless given. Setting the
+    threading.Event `cancel` makes a search return early.
+    """
+    size = len(board)
+    k = size if k is None else k
+    x, o = to_bitboard(board)
+
+    if size == k == bitboard.SIZE:
+        # look the move up in the perfect-play table if there is one,
+        # which also returns None if the game is over
+        if solutions is not None:
+            entry = perfect.lookup(solutions, x, o)
+            if entry is not None:
+                return None if entry[1] is None else divmod(entry[1], size)
+
+        # otherwise search the whole game, reusing the positions in
+        # `table` from earlier calls
+        if terminal(board):
+            return None
+        return (MAX_VALUE if player(board) == X else MIN_VALUE)(board)[1]
+
+    # larger boards are searched by the engine in their bitboard form
+    cell = engine_for(size, k).best_move(x, o, cancel=cancel)
+    return None if cell is None else divmod(cell, size)
+
+
+def engine_for(size, k):
+    """
+    Returns the search engine for a size x size board where k in a row
+    wins, building it on first use.
+    """
+    if (size, k) not in engines:
+        engines[size, k] = Engine(Geometry(size, k))
+    return engines[size, k]
 
-    # return the best move for X
-    if player(board) == X:
-        return MAX_VALUE(board)[1]
-    
-    # return the best move for O
-    return MIN_VALUE(board)[1]
 
+def MAX_VALUE(state, alpha=-2, beta=2):
+    """
+    Returns (value, action) for X on a 3 x 3 board by exhaustive
+    alpha-beta search over the board lists, the reference search that
+    perft.py profiles. minimax uses it for 3 x 3 positions the
+    perfect-play table does not cover.
+    """
+    global nodes
+    nodes += 1
 
-def MAX_VALUE(state):
+    # reuse the stored result if it settles this window
+    key, symmetry = board_key(state)
+    stored = table.lookup(key, FULL_DEPTH, alpha, beta)
+    if stored is not None:
+        return stored[0], board_action(stored[1], symmetry)
 
     # return the utility if the game is over
-    if terminal(state):
-        return utility(state), None
+    score = outcome(state)
+    if score is not None:
+        table.store(key, FULL_DEPTH, score, EXACT, None)
+        return score, None
 
     # set a value to the lowest value possible in the game
     value = -2
+    move = None
+    window_low = alpha
 
     # go through all possible actions in the game
     for action in actions(state):
-        MAX, play = MIN_VALUE(result(state, action))
-
-        # alpha-beta pruning to optimise minimax
-        if MAX < value:
-            break
+        MAX, play = MIN_VALUE(result(state, action), alpha, beta)
 
         # if the MAX value is greater than the current value, update value and move
-        if MAX > value or move is None:
+        if MAX > value:
             value = MAX
             move = action
 
-            # depth-limited minimax
-            if value == 1:
-                return value, move
+        # alpha-beta pruning: O will never allow more than beta
+        alpha = max(alpha, value)
+        if alpha >= beta or value == 1:
+            break
+
+    # store the value, and whether it is exact or only a bound
+    table.store(key, FULL_DEPTH, value, bound_flag(value, window_low, beta), key_cell(move, symmetry))
 
     # return the value and move
     return value, move
 
 
-def MIN_VALUE(state):
+def MIN_VALUE(state, alpha=-2, beta=2):
+    """
+    Returns (value, action) for O on a 3 x 3 board, as MAX_VALUE does for X.
+    """
+    global nodes
+    nodes += 1
+
+    # reuse the stored result if it settles this window
+    key, symmetry = board_key(state)
+    stored = table.lookup(key, FULL_DEPTH, alpha, beta)
+    if stored is not None:
+        return stored[0], board_action(stored[1], symmetry)
 
     # return the utility if the game is over
-    if terminal(state):
-        return utility(state), None
+    score = outcome(state)
+    if score is not None:
+        table.store(key, FULL_DEPTH, score, EXACT, None)
+        return score, None
 
     # set a value to the highest value possible in the game
     value = 2
+    move = None
+    window_high = beta
 
     # go through all possible actions in the game
     for action in actions(state):
-        MIN, play = MAX_VALUE(result(state, action))
-
-        # alpha-beta pruning
-        if MIN > value:
-            break
+        MIN, play = MAX_VALUE(result(state, action), alpha, beta)
 
         # if the MIN value is lesser than the current value, update value and move
-        if MIN < value or move is None:
+        if MIN < value:
             value = MIN
             move = action
 
-            # depth-limited minimax
-            if value == -1:
-                return value, move
+        # alpha-beta pruning: X will never allow less than alpha
+        beta = min(beta, value)
+        if alpha >= beta or value == -1:
+            break
+
+    # store the value, and whether it is exact or only a bound
+    table.store(key, FULL_DEPTH, value, bound_flag(value, alpha, window_high), key_cell(move, symmetry))
 
     # return the value and move
-    return value, move
\ No newline at end of file
+    return value, move
+
+
+def outcome(board):
+    """
+    Returns the utility of a finished game, or None if it is not over,
+    working out the winner only once.
+    """
+    value = winner(board)
+    if value == X:
+        return 1
+    elif value == O:
+        return -1
+    for row in board:
+        if EMPTY in row:
+            return None
+    return 0
+
+
+def bound_flag(value, alpha, beta):
+    """
+    Returns whether a value searched within (alpha, beta) is exact,
+    or only a lower or upper bound on the true value.
+    """
+    if value >= beta:
+        return LOWER
+    elif value <= alpha:
+        return UPPER
+    return EXACT
+
+
+def to_bitboard(board):
+    """
+    Returns the (x, o) bitboards of a square board of any size,
+    with cell (i, j) at bit len(board) * i + j.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (len(board) * i + j)
+            elif cell == O:
+                o |= 1 << (len(board) * i + j)
+    return x, o
+
+
+def from_bitboard(x, o, size=bitboard.SIZE):
+    """
+    Returns the size x size board of a pair of (x, o) bitboards.
+    """
+    board = [[EMPTY] * size for _ in range(size)]
+    for cell in range(size * size):
+        i, j = divmod(cell, size)
+        if x >> cell & 1:
+            board[i][j] = X
+        elif o >> cell & 1:
+            board[i][j] = O
+    return board
+
+
+def board_key(board):
+    """
+    Returns a hashable key shared by the board and all its rotations and
+    reflections, and the symmetry that carries the board onto the key.
+    """
+    key_x, key_o, symmetry = bitboard.canonical(*to_bitboard(board))
+    return (key_x, key_o), symmetry
+
+
+def key_cell(action, symmetry):
+    """
+    Returns the cell of the key that an action (i, j) is carried to by
+    `symmetry`, or None for None.
+    """
+    if action is None:
+        return None
+    return bitboard.to_canonical(bitboard.SIZE * action[0] + action[1], symmetry)
+
+
+def board_action(cell, symmetry):
+    """
+    Returns the action (i, j) on the board for a cell of its key,
+    or None for None.
+    """
+    if cell is None:
+        return None
+    return divmod(bitboard.from_canonical(cell, symmetry), bitboard.SIZE)
+
+
+# Positions searched by MAX_VALUE and MIN_VALUE, kept between calls,
+# and how many times they have been called
+table = TranspositionTable(TABLE_SIZE)
+nodes = 0
+
+# Solved positions for minimax, or None if perfect.py has not been run
+solutions = perfect.load()
+
+# Search engines behind minimax by (size, k), for positions the table
+# does not cover
+engines = {}
@@ -0,0 +1,194 @@
+"""
+Headless self-play tournament between Tic Tac Toe engines.
+
+Plays games between two engines across a process pool, alternating who
+plays X, and reports each engine's win, draw and loss rates, nodes
+searched per second and per-move latency percentiles as JSON. Every game
+starts with empty transposition tables, so the numbers do not depend on
+how many games a worker has already played.
+
+Engines:
+    minimax     tictactoe.minimax, from the perfect-play table if present
+    search      the search engine alone, to full depth
+    random      a uniformly random legal move
+    depth:N     the search engine limited to N plies
+
+Usage: python tournament.py ENGINE ENGINE [--games N] [--workers N] ...
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import tictactoe as ttt
+from engine import Engine, Geometry
+
+# Games handed to a worker at a time
+CHUNK_SIZE = 50
+
+
+def percentiles(values):
+    """
+    Returns the 50th, 90th and 99th percentiles and the maximum of
+    values, or {} if there are none.
+    """
+    if not values:
+        return {}
+    if len(values) == 1:
+        cuts = values * 99
+    else:
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": cuts[49], "p90": cuts[89], "p99": cuts[98], "max": max(values)}
+
+
+def make_player(spec, rng):
+    """
+    Returns a function from a board to (move, nodes searched) for an
+    engine spec, with empty transposition tables.
+    """
+    if spec == "minimax":
+        ttt.table.clear()
+
+        # positions missing from the perfect-play table are searched
+        def play(board):
+            before = ttt.nodes
+            move = ttt.minimax(board)
+            return move, ttt.nodes - before
+        return play
+
+    if spec == "random":
+        return lambda board: (rng.choice(sorted(ttt.actions(board))), 0)
+
+    if spec == "search" or spec.startswith("depth:"):
+        depth = None if spec == "search" else int(spec.split(":", 1)[1])
+        engine = Engine(Geometry(len(ttt.initial_state())), seconds=math.inf)
+
+        def play(board):
+            cell = engine.best_move(*ttt.to_bitboard(board), depth=depth)
+            return divmod(cell, len(board)), engine.nodes
+        return play
+
+    raise Exception(f"unknown engine {spec}")
+
+
+def play_game(players):
+    """
+    Plays one game between players (X, O) and returns the winner,
+    None for a draw, with each side's move latencies and nodes.
+    """
+    board = ttt.initial_state()
+    latencies = {ttt.X: [], ttt.O: []}
+    nodes = {ttt.X: 0, ttt.O: 0}
+    while not ttt.terminal(board):
+        side = ttt.player(board)
+        start = time.perf_counter()
+        move, searched = players[side == ttt.O](board)
+        latencies[side].append(time.perf_counter() - start)
+        nodes[side] += searched
+        board = ttt.result(board, move)
+    return ttt.winner(board), latencies, nodes
+
+
+def play_games(specs, first, count, seed):
+    """
+    Plays games first to first + count - 1 between two engine specs,
+    with the first engine as X in even games, and returns the totals
+    for each engine.
+    """
+    rng = random.Random(seed + first)
+    totals = [{"wins": 0, "draws": 0, "losses": 0, "nodes": 0,
+               "seconds": 0.0, "latencies": []} for _ in specs]
+
+    for game in range(first, first + count):
+        order = (0, 1) if game % 2 == 0 else (1, 0)
+        players = [make_player(specs[n], rng) for n in order]
+        winner, latencies, nodes = play_game(players)
+        for n, side in zip(order, (ttt.X, ttt.O)):
+            if winner is None:
+                totals[n]["draws"] += 1
+            elif winner == side:
+                totals[n]["wins"] += 1
+            else:
+                totals[n]["losses"] += 1
+            totals[n]["nodes"] += nodes[side]
+            totals[n]["seconds"] += sum(latencies[side])
+            totals[n]["latencies"].extend(latencies[side])
+    return totals
+
+
+def report(specs, games, chunks):
+    """
+    Returns the JSON-ready results from the totals of every chunk.
+    """
+    engines = []
+    for n, spec in enumerate(specs):
+        wins = sum(chunk[n]["wins"] for chunk in chunks)
+        draws = sum(chunk[n]["draws"] for chunk in chunks)
+        losses = sum(chunk[n]["losses"] for chunk in chunks)
+        nodes = sum(chunk[n]["nodes"] for chunk in chunks)
+        seconds = sum(chunk[n]["seconds"] for chunk in chunks)
+        latencies = [latency for chunk in chunks for latency in chunk[n]["latencies"]]
+        engines.append({
+            "engine": spec,
+            "wins": wins,
+            "draws": draws,
+            "losses": losses,
+            "win_rate": wins / games if games else None,
+            "draw_rate": draws / games if games else None,
+            "loss_rate": losses / games if games else None,
+            "moves": len(latencies),
+            "nodes": nodes,
+            "nodes_per_second": nodes / seconds if nodes else None,
+            "latency_seconds": percentiles(latencies)
+        })
+    return engines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Tic Tac Toe engines against each other.")
+    parser.add_argument("engines", nargs=2, metavar="ENGINE",
+                        help="minimax, search, random or depth:N")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="file for the JSON results, stdout if omitted")
+    args = parser.parse_args()
+
+    # fail on a bad spec before starting any workers
+    for spec in args.engines:
+        make_player(spec, random.Random())
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [
+            pool.submit(play_games, args.engines, first,
+                        min(CHUNK_SIZE, args.games - first), args.seed)
+            for first in range(0, args.games, CHUNK_SIZE)
+        ]
+        chunks = [future.result() for future in futures]
+
+    results = {
+        "python": sys.version.split()[0],
+        "games": args.games,
+        "workers": args.workers,
+        "seed": args.seed,
+        "seconds": time.perf_counter() - start,
+        "engines": report(args.engines, args.games, chunks)
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Runs AI searches on a background thread, so the pygame loop keeps
+drawing and handling input while the computer thinks.
+"""
+
+import copy
+import threading
+
+
+class Worker():
+    """
+    Runs one search at a time. `search` maps a board to a move, and
+    returns early once the threading.Event passed as its `cancel`
+    argument is set.
+    """
+
+    def __init__(self, search):
+        self.search = search
+        self.thread = None
+        self.cancelled = None
+        self.lock = threading.Lock()
+
+        # move found by the current search, or the exception it raised,
+        # once done is True
+        self.move = None
+        self.error = None
+        self.done = False
+
+    def start(self, board):
+        """
+        Starts searching a copy of `board`, cancelling any earlier search.
+        """
+        self.cancel()
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, args=(copy.deepcopy(board), self.cancelled), daemon=True
+        )
+        self.thread.start()
+
+    def run(self, board, cancelled):
+        move, error = None, None
+        try:
+            move = self.search(board, cancel=cancelled)
+        except Exception as e:
+            error = e
+        with self.lock:
+            # a cancelled search leaves its move unclaimed
+            if self.thread is threading.current_thread():
+                self.move = move
+                self.error = error
+                self.done = True
+
+    def cancel(self):
+        """
+        Stops the current search and forgets its move.
+        """
+        thread = self.thread
+        with self.lock:
+            self.thread = None
+            self.move = None
+            self.error = None
+            self.done = False
+        if self.cancelled is not None:
+            self.cancelled.set()
+        if thread is not None and thread.is_alive():
+            thread.join()
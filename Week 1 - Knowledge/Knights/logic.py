@@ -11,6 +11,13 @@ class Sentence():
         """Returns string formula representing logical sentence."""
         return ""
 
+    def expression(self, positions):
+        """
+        Returns a Python expression evaluating the sentence over a tuple
+        `model`, where positions maps each symbol name to its index.
+        """
+        raise Exception("nothing to compile")
+
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
         return set()
@@ -65,6 +72,9 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
+    def expression(self, positions):
+        return f"model[{positions[self.name]}]"
+
     def symbols(self):
         return {self.name}
 
@@ -89,6 +99,9 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
+    def expression(self, positions):
+        return f"(not {self.operand.expression(positions)})"
+
     def symbols(self):
         return self.operand.symbols()
 
@@ -126,6 +139,12 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
+    def expression(self, positions):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(conjunct.expression(positions)
+                                  for conjunct in self.conjuncts) + ")"
+
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
@@ -157,6 +176,12 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
+    def expression(self, positions):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(disjunct.expression(positions)
+                                 for disjunct in self.disjuncts) + ")"
+
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
@@ -188,6 +213,11 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
+    def expression(self, positions):
+        antecedent = self.antecedent.expression(positions)
+        consequent = self.consequent.expression(positions)
+        return f"(not {antecedent} or {consequent})"
+
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
@@ -221,43 +251,52 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
+    def expression(self, positions):
+        left = self.left.expression(positions)
+        right = self.right.expression(positions)
+        return f"((not {left}) == (not {right}))"
+
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+def model_check(knowledge, query, engine="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    The "enumerate" engine checks every model of the symbols; the "sat"
+    engine searches for a model of knowledge and not query with the
+    clause-learning solver in sat.py, which scales to far more symbols.
+    """
+    if engine == "sat":
+        from sat import entails
+        return entails(knowledge, query)
+    elif engine != "enumerate":
+        raise Exception(f"unknown model checking engine {engine}")
+
+    # Get all symbols in both knowledge and query, in a fixed order
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    # Compile both sentences to functions of a tuple of symbol values
+    knowledge_holds = compile_sentence(knowledge, symbols)
+    query_holds = compile_sentence(query, symbols)
+
+    # In every model where knowledge base is true, query must also be true
+    for model in itertools.product((True, False), repeat=len(symbols)):
+        if knowledge_holds(model) and not query_holds(model):
+            return False
+    return True
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Returns a function evaluating the sentence over a tuple of values,
+    one for each name in symbols, in order. Sentences that cannot be
+    compiled, such as ones nested too deeply for the Python parser,
+    are evaluated through Sentence.evaluate instead.
+    """
+    positions = {name: index for index, name in enumerate(symbols)}
+    try:
+        return eval(f"lambda model: {sentence.expression(positions)}")
+    except Exception:
+        return lambda model: sentence.evaluate(dict(zip(symbols, model)))
@@ -0,0 +1,316 @@
+"""
+Entailment by satisfiability, for model_check(..., engine="sat").
+
+A knowledge base entails a query exactly when knowledge ∧ ¬query has no
+model. The sentence is compiled to conjunctive normal form with the
+Tseitin encoding, which gives every compound subsentence a fresh
+variable so the clauses grow linearly with the sentence, and the clauses
+are decided by conflict-driven clause learning (CDCL): unit propagation
+over two watched literals per clause, a learned clause at the first
+unique implication point of each conflict, and backjumping.
+
+Variables are positive integers and literals are variables or their
+negations, as in the DIMACS format.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+TRUE = 1
+FALSE = -1
+UNASSIGNED = 0
+
+# Factor by which the activity bump grows after each conflict
+ACTIVITY_GROWTH = 1 / 0.95
+
+# Activities are scaled down once any passes this
+ACTIVITY_LIMIT = 1e100
+
+
+class Encoder():
+    """
+    Tseitin encoding of sentences into clauses.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.count = 0
+        self.clauses = []
+
+        # literal standing for each subsentence encoded so far
+        self.literals = {}
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def add(self, sentence):
+        """
+        Adds clauses that hold exactly when `sentence` is true.
+        """
+        self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to `sentence`, adding the clauses
+        that define it.
+        """
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.variables:
+                self.variables[sentence.name] = self.new_variable()
+            literal = self.variables[sentence.name]
+
+        elif isinstance(sentence, Not):
+            literal = -self.literal(sentence.operand)
+
+        elif isinstance(sentence, And):
+            parts = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            literal = self.new_variable()
+            for part in parts:
+                self.clauses.append([-literal, part])
+            self.clauses.append([literal] + [-part for part in parts])
+
+        elif isinstance(sentence, Or):
+            parts = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            literal = self.new_variable()
+            for part in parts:
+                self.clauses.append([literal, -part])
+            self.clauses.append([-literal] + parts)
+
+        elif isinstance(sentence, Implication):
+            antecedent = self.literal(sentence.antecedent)
+            consequent = self.literal(sentence.consequent)
+            literal = self.new_variable()
+            self.clauses.append([-literal, -antecedent, consequent])
+            self.clauses.append([literal, antecedent])
+            self.clauses.append([literal, -consequent])
+
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            literal = self.new_variable()
+            self.clauses.append([-literal, -left, right])
+            self.clauses.append([-literal, left, -right])
+            self.clauses.append([literal, left, right])
+            self.clauses.append([literal, -left, -right])
+
+        else:
+            raise Exception(f"cannot encode {sentence!r}")
+
+        self.literals[sentence] = literal
+        return literal
+
+
+class Solver():
+    """
+    CDCL solver over `count` variables and a list of clauses.
+    """
+
+    def __init__(self, count, clauses):
+        self.count = count
+        self.values = [UNASSIGNED] * (count + 1)
+        self.levels = [0] * (count + 1)
+        self.reasons = [None] * (count + 1)
+        self.phases = [FALSE] * (count + 1)
+        self.activity = [0.0] * (count + 1)
+        self.bump = 1.0
+
+        # assigned literals in order, where each decision level starts,
+        # and the next literal to propagate
+        self.trail = []
+        self.starts = []
+        self.head = 0
+
+        # clauses watching each literal, keyed by the literal
+        self.watches = {literal: [] for variable in range(1, count + 1)
+                        for literal in (variable, -variable)}
+        self.unsatisfiable = False
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def value(self, literal):
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, clause):
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            if self.value(clause[0]) == FALSE:
+                self.unsatisfiable = True
+            elif self.value(clause[0]) == UNASSIGNED:
+                self.assign(clause[0], None)
+        else:
+            self.watches[clause[0]].append(clause)
+            self.watches[clause[1]].append(clause)
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = TRUE if literal > 0 else FALSE
+        self.levels[variable] = len(self.starts)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses. Returns a clause
+        made false by the assignment, or None.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches[false]
+            self.watches[false] = kept = []
+
+            for n, clause in enumerate(watching):
+                # keep the false literal second
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                if self.value(clause[0]) == TRUE:
+                    kept.append(clause)
+                    continue
+
+                # watch another literal that is not false, if there is one
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) != FALSE:
+                        clause[1], clause[k] = clause[k], false
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(clause[0]) == FALSE:
+                        kept.extend(watching[n + 1:])
+                        return clause
+                    self.assign(clause[0], clause)
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, asserting literal
+        first and the literal of the next highest level second, and the
+        level to jump back to.
+        """
+        level = len(self.starts)
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+
+        # resolve back along the trail to the first unique implication point
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                variable = abs(other)
+                if variable not in seen and self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump_activity(variable)
+                    if self.levels[variable] == level:
+                        pending += 1
+                    else:
+                        learned.append(other)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            seen.discard(abs(literal))
+            clause = self.reasons[abs(literal)]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+        second = max(range(1, len(learned)), key=lambda n: self.levels[abs(learned[n])])
+        learned[1], learned[second] = learned[second], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump_activity(self, variable):
+        self.activity[variable] += self.bump
+        if self.activity[variable] > ACTIVITY_LIMIT:
+            self.activity = [activity / ACTIVITY_LIMIT for activity in self.activity]
+            self.bump /= ACTIVITY_LIMIT
+
+    def backtrack(self, level):
+        """
+        Undoes every assignment made above decision level `level`.
+        """
+        if len(self.starts) <= level:
+            return
+        start = self.starts[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = UNASSIGNED
+            self.reasons[variable] = None
+        del self.trail[start:]
+        del self.starts[level:]
+        self.head = start
+
+    def decide(self):
+        """
+        Returns the unassigned variable with the highest activity, or
+        None if every variable is assigned.
+        """
+        best = None
+        for variable in range(1, self.count + 1):
+            if (self.values[variable] == UNASSIGNED
+                    and (best is None or self.activity[variable] > self.activity[best])):
+                best = variable
+        return best
+
+    def solve(self):
+        """
+        Returns True if the clauses are satisfiable, leaving a model in
+        self.values, and False otherwise.
+        """
+        if self.unsatisfiable:
+            return False
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.starts:
+                    self.unsatisfiable = True
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.watches[learned[0]].append(learned)
+                    self.watches[learned[1]].append(learned)
+                    self.assign(learned[0], learned)
+                self.bump *= ACTIVITY_GROWTH
+            else:
+                variable = self.decide()
+                if variable is None:
+                    return True
+                self.starts.append(len(self.trail))
+                self.assign(variable * self.phases[variable], None)
+
+
+def satisfiable(sentence):
+    """
+    Returns a model of `sentence`, as a dict from symbol name to value,
+    or None if it has none.
+    """
+    encoder = Encoder()
+    encoder.add(sentence)
+    solver = Solver(encoder.count, encoder.clauses)
+    if not solver.solve():
+        return None
+    return {name: solver.values[variable] == TRUE
+            for name, variable in encoder.variables.items()}
+
+
+def entails(knowledge, query):
+    """
+    Returns True if `knowledge` entails `query`.
+    """
+    return satisfiable(And(knowledge, Not(query))) is None